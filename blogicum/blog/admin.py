@@ -1,7 +1,126 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import ValidationError
+from django.template.defaultfilters import filesizeformat
 from .models import Category, Location, Post, Comment
+from . import moderation
 
-admin.site.register(Category)
-admin.site.register(Location)
-admin.site.register(Post)
-admin.site.register(Comment)
+
+class PublishedModelAdmin(admin.ModelAdmin):
+    """Bulk (un)publishing as one UPDATE each."""
+
+    actions = ('unpublish', 'republish')
+
+    @admin.action(description='Снять с публикации',
+                  permissions=('change',))
+    def unpublish(self, request, queryset):
+        count = moderation.set_published(queryset, False)
+        self.message_user(request, f'Снято с публикации: {count}.')
+
+    @admin.action(description='Опубликовать', permissions=('change',))
+    def republish(self, request, queryset):
+        count = moderation.set_published(queryset, True)
+        self.message_user(request, f'Опубликовано: {count}.')
+
+
+class ChunkedDeleteMixin:
+    """Replaces delete_selected, which loads every row and its cascade."""
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description='Удалить все публикации и комментарии авторов',
+                  permissions=('delete',))
+    def delete_author_content(self, request, queryset):
+        authors = list(
+            queryset.order_by().values_list('author', flat=True).distinct()
+        )
+        posts, comments = moderation.delete_author_content(authors)
+        self.message_user(
+            request,
+            f'Авторов: {len(authors)}; удалено публикаций: {posts},'
+            f' комментариев: {comments}.',
+        )
+
+
+@admin.register(Category)
+class CategoryAdmin(PublishedModelAdmin):
+    list_display = ('title', 'slug', 'is_published')
+
+
+@admin.register(Location)
+class LocationAdmin(PublishedModelAdmin):
+    list_display = ('name', 'is_published')
+
+
+class PostActionForm(ActionForm):
+    category = forms.ModelChoiceField(
+        queryset=Category.objects.all(), required=False,
+        label='Категория',
+    )
+
+
+@admin.register(Post)
+class PostAdmin(ChunkedDeleteMixin, PublishedModelAdmin):
+    list_display = ('title', 'author', 'pub_date', 'is_published',
+                    'image_info')
+    list_select_related = ('author',)
+    readonly_fields = ('image_info',)
+    action_form = PostActionForm
+    actions = PublishedModelAdmin.actions + (
+        'move_to_category', 'delete_posts', 'delete_author_content',
+    )
+
+    @admin.display(description='Изображение')
+    def image_info(self, post):
+        # Read from the manifest recorded on save, never from the file.
+        manifest = post.image_variants
+        if not post.image or manifest.get('source') != post.image.name:
+            return '—'
+        return '{}×{}, {}, {}'.format(
+            manifest['width'], manifest.get('height', '?'),
+            manifest.get('format', '').upper(),
+            filesizeformat(manifest.get('size', 0)),
+        )
+
+    @admin.action(description='Перенести в категорию',
+                  permissions=('change',))
+    def move_to_category(self, request, queryset):
+        try:
+            category = forms.ModelChoiceField(Category.objects.all()).clean(
+                request.POST.get('category')
+            )
+        except ValidationError:
+            self.message_user(
+                request, 'Выберите категорию.', level=messages.WARNING
+            )
+            return
+        count = moderation.move_to_category(queryset, category)
+        self.message_user(
+            request, f'Перенесено в «{category}»: {count}.'
+        )
+
+    @admin.action(description='Удалить выбранные публикации',
+                  permissions=('delete',))
+    def delete_posts(self, request, queryset):
+        posts, comments = moderation.delete_posts(queryset)
+        self.message_user(
+            request,
+            f'Удалено публикаций: {posts}, комментариев: {comments}.',
+        )
+
+
+@admin.register(Comment)
+class CommentAdmin(ChunkedDeleteMixin, admin.ModelAdmin):
+    list_display = ('text', 'author', 'post', 'created_at')
+    list_select_related = ('author', 'post')
+    actions = ('delete_comments', 'delete_author_content')
+
+    @admin.action(description='Удалить выбранные комментарии',
+                  permissions=('delete',))
+    def delete_comments(self, request, queryset):
+        count = moderation.delete_comments(queryset)
+        self.message_user(request, f'Удалено комментариев: {count}.')
@@ -1,7 +1,17 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .fts import ensure_fts_triggers
+        from .sqlite import configure_connection
+
+        post_migrate.connect(ensure_fts_triggers, sender=self)
+        connection_created.connect(configure_connection)
@@ -0,0 +1,81 @@
+import hashlib
+import math
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+
+GENERATION_KEY = 'blog:page_cache:generation'
+
+
+def page_cache():
+    """The BLOG_PAGE_CACHE alias, shared by every worker process."""
+    return caches[settings.BLOG_PAGE_CACHE]
+
+
+def bump_page_cache_generation():
+    """Invalidate every cached page at once by moving to a new key space."""
+    cache = page_cache()
+    if not cache.add(GENERATION_KEY, 1, None):
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 1, None)
+
+
+def page_cache_timeout():
+    """Seconds a page may live, capped at the next scheduled publication.
+
+    Visibility of a deferred post depends on timezone.now(), so no signal
+    fires when it goes live; the cached page has to expire by then.
+    """
+    from .models import Post
+
+    timeout = getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 0)
+    now = timezone.now()
+    next_pub_date = Post.objects.filter(
+        is_published=True, pub_date__gt=now
+    ).order_by('pub_date').values_list('pub_date', flat=True).first()
+    if next_pub_date is not None:
+        timeout = min(
+            timeout, math.ceil((next_pub_date - now).total_seconds())
+        )
+    return timeout
+
+
+def anonymous_page_cache(view):
+    """Serve whole responses from the cache to anonymous GET requests.
+
+    Enabled by a positive BLOG_PAGE_CACHE_TIMEOUT setting.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            not getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 0)
+            or request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+        ):
+            return view(request, *args, **kwargs)
+
+        cache = page_cache()
+        generation = cache.get_or_set(GENERATION_KEY, 1, None)
+        path_hash = hashlib.md5(
+            request.get_full_path().encode()
+        ).hexdigest()
+        key = f'blog:page:{generation}:{path_hash}'
+        response = cache.get(key)
+        if response is not None:
+            return get_conditional_response(
+                request, etag=response.get('ETag'), response=response
+            )
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = page_cache_timeout()
+            if timeout > 0:
+                cache.set(key, response, timeout)
+        return response
+
+    return wrapper
@@ -0,0 +1,114 @@
+"""Validators for conditional GET on the read views.
+
+Each function issues one aggregate query and returns an ETag (or a
+Last-Modified datetime) for django.views.decorators.http.condition.
+ETags mix in the viewer, since pages differ for the logged-in author, and
+the viewer's username, which the page header shows.
+Feeds rely on ETags rather than Last-Modified: deleting a post lowers the
+row count but leaves every remaining timestamp untouched. Comment edits
+are seen through Post.updated_at, which the comment signals touch.
+"""
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Category, Post
+
+
+def _etag(request, *parts):
+    raw = repr((request.user.pk, request.user.get_username()) + parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _single_row(queryset):
+    # Slicing instead of first() keeps the ORDER BY (and its sort) out.
+    rows = list(queryset.order_by()[:1])
+    return rows[0] if rows else None
+
+
+def _visible(prefix=''):
+    return Q(**{
+        f'{prefix}is_published': True,
+        f'{prefix}category__is_published': True,
+        f'{prefix}pub_date__lte': timezone.now(),
+    })
+
+
+def index_etag(request):
+    stats = Post.objects.filter(_visible()).aggregate(
+        count=Count('pk'),
+        post=Max('updated_at'),
+        category=Max('category__updated_at'),
+        location=Max('location__updated_at'),
+    )
+    return _etag(request, *stats.values())
+
+
+def category_etag(request, category_slug):
+    # The category itself is required to be published, so only the post
+    # half of the visibility rule is needed here.
+    posts = Q(
+        posts__is_published=True, posts__pub_date__lte=timezone.now()
+    )
+    stats = _single_row(
+        Category.objects.filter(
+            slug=category_slug, is_published=True
+        ).values('updated_at').annotate(
+            count=Count('posts', filter=posts),
+            post=Max('posts__updated_at', filter=posts),
+            location=Max('posts__location__updated_at', filter=posts),
+        )
+    )
+    if stats is None:
+        return None
+    return _etag(request, *stats.values())
+
+
+def profile_etag(request, username):
+    posts = Q() if request.user.get_username() == username else _visible(
+        'posts__'
+    )
+    stats = _single_row(
+        get_user_model().objects.filter(username=username).values(
+            'first_name', 'last_name', 'is_staff'
+        ).annotate(
+            count=Count('posts', filter=posts),
+            post=Max('posts__updated_at', filter=posts),
+            category=Max('posts__category__updated_at', filter=posts),
+            location=Max('posts__location__updated_at', filter=posts),
+        )
+    )
+    if stats is None:
+        return None
+    return _etag(request, *stats.values())
+
+
+def _post_detail_stats(request, post_id):
+    # Shared by both validators so the page costs a single query.
+    if not hasattr(request, '_post_detail_stats'):
+        request._post_detail_stats = _single_row(
+            Post.objects.filter(pk=post_id).values(
+                'updated_at', 'category__updated_at', 'location__updated_at',
+                'author__username',
+            ).annotate(count=Count('comments'))
+        )
+    return request._post_detail_stats
+
+
+def post_detail_etag(request, post_id):
+    stats = _post_detail_stats(request, post_id)
+    if stats is None:
+        return None
+    return _etag(request, *stats.values())
+
+
+def post_detail_last_modified(request, post_id):
+    stats = _post_detail_stats(request, post_id)
+    if stats is None:
+        return None
+    return max(
+        value for key, value in stats.items()
+        if key.endswith('updated_at') and value is not None
+    )
@@ -0,0 +1,201 @@
+"""Publish/subscribe of live blog events, such as new comments.
+
+Publishers are ordinary sync code (views, possibly in worker threads);
+subscribers are coroutines on an event loop, one asyncio.Queue each, so
+idle subscribers cost no thread. The broker is chosen by
+BLOG_EVENTS_BACKEND:
+
+- LocalBroker delivers within the current process only.
+- FileBroker appends events to a shared file that every process tails
+  with one task per event loop: a local stand-in for Redis pub/sub when
+  several worker processes serve the same site. Once the file has
+  reached max_size, the next publish renames it to <path>.1 (replacing
+  the previous one) and starts a new file; tailers notice the new inode
+  and read it from the start. Events still unread in the old file at
+  that moment are missed, like those a stalled subscriber drops.
+"""
+import asyncio
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+_broker = None
+
+
+class Subscription:
+    """The queue of one subscriber; registered on creation."""
+
+    def __init__(self, broker, channel):
+        self.broker, self.channel = broker, channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(broker.queue_size)
+        broker._add(self)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A stalled reader misses events; it catches up on reconnect
+            # through Last-Event-ID.
+            pass
+
+    def close(self):
+        self.broker._remove(self)
+
+
+class LocalBroker:
+    """Fan-out to the subscribers of this process."""
+
+    queue_size = 100
+
+    def __init__(self, **options):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, message):
+        self._deliver(channel, message)
+
+    def subscribe(self, channel):
+        """Start receiving `channel`; call from a coroutine."""
+        return Subscription(self, channel)
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscribers.setdefault(
+                subscription.channel, set()
+            ).add(subscription)
+
+    def _remove(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.channel, None)
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.offer, message
+                )
+            except RuntimeError:
+                # The subscriber's loop is closed; it unsubscribes itself.
+                pass
+
+
+class FileBroker(LocalBroker):
+    """Share events between processes through an append-only file."""
+
+    def __init__(self, path, poll_interval=0.5, max_size=1024 * 1024,
+                 **options):
+        super().__init__(**options)
+        self.path = str(path)
+        self.poll_interval = poll_interval
+        self.max_size = max_size
+        self._readers = {}
+
+    def publish(self, channel, message):
+        line = json.dumps({'channel': channel, 'message': message}) + '\n'
+        if self.max_size and self._end()[1] >= self.max_size:
+            self._rotate()
+        # A single O_APPEND write keeps lines from different processes
+        # from interleaving.
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+
+    def _rotate(self):
+        try:
+            os.replace(self.path, self.path + '.1')
+        except FileNotFoundError:
+            pass  # Another process has just rotated it.
+
+    def subscribe(self, channel):
+        loop = asyncio.get_running_loop()
+        reader = self._readers.get(loop)
+        if reader is None or reader.done():
+            # Start from the current end, before anything else can land.
+            self._readers[loop] = loop.create_task(
+                self._tail(*self._end())
+            )
+        return super().subscribe(channel)
+
+    def _end(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None, 0
+        return stat.st_ino, stat.st_size
+
+    async def _tail(self, inode, position):
+        pending = b''
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                file = open(self.path, 'rb')
+            except OSError:
+                continue
+            with file:
+                stat = os.fstat(file.fileno())
+                if stat.st_ino != inode or stat.st_size < position:
+                    # The file was rotated or truncated: read the new one.
+                    inode, position, pending = stat.st_ino, 0, b''
+                file.seek(position)
+                data = file.read(stat.st_size - position)
+            position += len(data)
+            pending += data
+            *lines, pending = pending.split(b'\n')
+            for line in lines:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                self._deliver(event['channel'], event['message'])
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        backend = import_string(settings.BLOG_EVENTS_BACKEND)
+        _broker = backend(**settings.BLOG_EVENTS_OPTIONS)
+    return _broker
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting.startswith('BLOG_EVENTS_'):
+        _broker = None
+
+
+def comment_channel(post_id):
+    return f'post:{post_id}:comments'
+
+
+def comment_event(comment):
+    return {
+        'id': comment.pk,
+        'parent': comment.parent_pk,
+        'depth': comment.depth,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created_at': comment.created_at.isoformat(),
+    }
+
+
+def publish_comment(comment):
+    get_broker().publish(
+        comment_channel(comment.post_id), comment_event(comment)
+    )
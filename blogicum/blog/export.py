@@ -0,0 +1,105 @@
+"""Streaming export of posts and comments as NDJSON or CSV.
+
+Rows are read in primary-key batches with .values(), so neither model
+instances nor the full result set are ever held in memory.
+"""
+import csv
+import datetime
+import json
+
+from django.utils import timezone
+
+from .models import Comment, Post
+
+EXPORT_BATCH_SIZE = 2000
+
+EXPORT_FIELDS = {
+    'posts': {
+        'id': 'id',
+        'title': 'title',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'is_published': 'is_published',
+        'author': 'author__username',
+        'category': 'category__slug',
+        'location': 'location__name',
+        'image': 'image',
+        'comment_count': 'comment_count',
+    },
+    'comments': {
+        'id': 'id',
+        'post_id': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created_at': 'created_at',
+    },
+}
+
+
+def export_queryset(kind, since=None, until=None, category=None):
+    if kind == 'posts':
+        queryset, date_field, category_field = (
+            Post.objects.all(), 'pub_date', 'category__slug'
+        )
+    else:
+        queryset, date_field, category_field = (
+            Comment.objects.all(), 'created_at', 'post__category__slug'
+        )
+    if since:
+        queryset = queryset.filter(**{f'{date_field}__gte': _day(since)})
+    if until:
+        queryset = queryset.filter(**{
+            f'{date_field}__lt': _day(until + datetime.timedelta(days=1))
+        })
+    if category:
+        queryset = queryset.filter(**{category_field: category})
+    return queryset
+
+
+def _day(date):
+    return timezone.make_aware(
+        datetime.datetime.combine(date, datetime.time.min)
+    )
+
+
+def iter_rows(kind, queryset, batch_size=EXPORT_BATCH_SIZE):
+    fields = EXPORT_FIELDS[kind]
+    queryset = queryset.order_by('pk').values_list(*fields.values())
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        last_pk = batch[-1][0]
+        for row in batch:
+            yield dict(zip(fields, row))
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=_json_default) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(kind, rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=list(EXPORT_FIELDS[kind]))
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_export(kind, export_format, queryset):
+    rows = iter_rows(kind, queryset)
+    if export_format == 'csv':
+        return iter_csv(kind, rows)
+    return iter_ndjson(rows)
@@ -1,13 +1,77 @@
 from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from PIL import Image
 from .models import Post, Comment
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+
+class HeaderCheckedImageField(forms.ImageField):
+    """ImageField that judges an upload by its header before any decode.
+
+    Format and dimensions come from Image.open(), which only parses the
+    header, so an oversized or decompression-bomb image is rejected
+    without allocating its bitmap. Spooled uploads are read from their
+    temporary file rather than copied into memory.
+    """
+
+    default_error_messages = {
+        'too_large': 'Файл больше допустимого размера.',
+        'unsupported_format': 'Неподдерживаемый формат изображения.',
+        'too_many_pixels': 'Изображение слишком большое по разрешению.',
+    }
+
+    def to_python(self, data):
+        f = forms.FileField.to_python(self, data)
+        if f is None:
+            return None
+        if (getattr(f, 'truncated', False)
+                or f.size > settings.BLOG_MAX_UPLOAD_SIZE):
+            raise ValidationError(
+                self.error_messages['too_large'], code='too_large'
+            )
+        if hasattr(f, 'temporary_file_path'):
+            source = f.temporary_file_path()
+        else:
+            source = f
+        try:
+            with Image.open(source) as image:
+                if image.format not in settings.BLOG_IMAGE_FORMATS:
+                    raise ValidationError(
+                        self.error_messages['unsupported_format'],
+                        code='unsupported_format',
+                    )
+                width, height = image.size
+                if width * height > settings.BLOG_MAX_IMAGE_PIXELS:
+                    raise ValidationError(
+                        self.error_messages['too_many_pixels'],
+                        code='too_many_pixels',
+                    )
+                # verify() walks the chunks without decoding pixel data.
+                image.verify()
+        except ValidationError:
+            raise
+        except Image.DecompressionBombError as exc:
+            raise ValidationError(
+                self.error_messages['too_many_pixels'],
+                code='too_many_pixels',
+            ) from exc
+        except Exception as exc:
+            raise ValidationError(
+                self.error_messages['invalid_image'], code='invalid_image'
+            ) from exc
+        f.image = image
+        f.content_type = Image.MIME.get(image.format)
+        f.seek(0)
+        return f
+
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('title', 'text', 'pub_date', 'location', 'category', 'image', 'is_published')
+        field_classes = {'image': HeaderCheckedImageField}
         widgets = {
             'pub_date': forms.DateTimeInput(
                 attrs={
@@ -27,7 +91,25 @@ class CommentForm(forms.ModelForm):
         model = Comment
         fields = ('text',)
 
+
+class NewCommentsForm(forms.Form):
+    after = forms.IntegerField(min_value=0, required=False)
+    format = forms.ChoiceField(
+        choices=(('html', 'HTML'), ('json', 'JSON')),
+        required=False,
+    )
+
 class UserEditForm(forms.ModelForm):
     class Meta:
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class ExportForm(forms.Form):
+    format = forms.ChoiceField(
+        choices=(('ndjson', 'NDJSON'), ('csv', 'CSV')),
+        required=False,
+    )
+    since = forms.DateField(required=False)
+    until = forms.DateField(required=False)
+    category = forms.SlugField(required=False)
@@ -0,0 +1,47 @@
+"""Triggers keeping the blog_post_fts index in step with blog_post.
+
+The SQLite schema editor rebuilds blog_post on most ALTERs, which drops
+every trigger on it, so they are (re)created after each migrate run.
+"""
+from django.db import connections
+
+TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_ai AFTER INSERT ON blog_post
+    BEGIN
+        INSERT INTO blog_post_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_ad AFTER DELETE ON blog_post
+    BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_au
+    AFTER UPDATE OF title, text ON blog_post
+    BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO blog_post_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+]
+
+
+def ensure_fts_triggers(sender, using='default', **kwargs):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'blog_post_fts'"
+        )
+        if cursor.fetchone() is None:
+            return
+        for sql in TRIGGERS_SQL:
+            cursor.execute(sql)
@@ -1,10 +1,35 @@
-from django.db.models import Count
+import base64
+import re
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Length
 from django.core.paginator import Paginator
 from django.utils import timezone
 
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+# A comment's path is its ancestors' paths plus its own id, in fixed-width
+# base 36 segments, so sorting by path lists every thread depth-first with
+# replies in the order they were written.
+COMMENT_PATH_STEP = 8
+COMMENT_PATH_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+# Sorts after every path digit: [path, path + END) is the whole subtree.
+COMMENT_PATH_END = '~'
+
+
+def comment_path_segment(pk):
+    segment = ''
+    while pk:
+        pk, digit = divmod(pk, 36)
+        segment = COMMENT_PATH_DIGITS[digit] + segment
+    return segment.rjust(COMMENT_PATH_STEP, '0')
 
-def comment_count(queryset):
-    return queryset.annotate(comment_count=Count("comments"))
+
+THREAD_PATH_RE = re.compile(r'(?:[0-9a-z]{%d})+' % COMMENT_PATH_STEP)
 
 
 def get_published_posts(queryset):
@@ -26,6 +51,241 @@ def get_paginator(request, queryset, per_page=10):
     return paginator.get_page(page_number)
 
 
+def encode_cursor(obj, direction):
+    raw = f'{direction}|{obj.pub_date.isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (direction, timestamp, pk), or None for a malformed cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, pub_date, pk = (
+            base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        )
+        if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+            return None
+        return direction, datetime.fromisoformat(pub_date), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """A page selected by a (timestamp, id) key, without COUNT(*)."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if not self.has_next_page:
+            return None
+        return encode_cursor(self.object_list[-1], CURSOR_NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous_page:
+            return None
+        return encode_cursor(self.object_list[0], CURSOR_PREVIOUS)
+
+
+class ThreadPage(KeysetPage):
+    """A page of comments keyed on their materialized path.
+
+    The cursors come from the first and last rows read, which may be
+    hidden replies rather than the comments shown.
+    """
+
+    def __init__(self, object_list, has_next, has_previous, first_path=None,
+                 last_path=None):
+        super().__init__(object_list, has_next, has_previous)
+        self.first_path = first_path
+        self.last_path = last_path
+
+    @property
+    def next_cursor(self):
+        if not self.has_next_page:
+            return None
+        return CURSOR_NEXT + self.last_path
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous_page:
+            return None
+        return CURSOR_PREVIOUS + self.first_path
+
+
+def decode_thread_cursor(cursor):
+    """Return (direction, path), or None for a malformed cursor."""
+    direction, path = cursor[:1], cursor[1:]
+    if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+        return None
+    if not THREAD_PATH_RE.fullmatch(path):
+        return None
+    return direction, path
+
+
+def _keyset_page_from_cursor(queryset, cursor, per_page):
+    direction, pub_date, pk = cursor
+    if direction == CURSOR_NEXT:
+        rows = list(
+            queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            ).order_by('-pub_date', '-pk')[:per_page + 1]
+        )
+        return KeysetPage(rows[:per_page], len(rows) > per_page, True)
+
+    rows = list(
+        queryset.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        ).order_by('pub_date', 'pk')[:per_page + 1]
+    )
+    return KeysetPage(
+        rows[:per_page][::-1], True, len(rows) > per_page
+    )
+
+
+def get_keyset_page(request, queryset, per_page=10):
+    cursor = decode_cursor(request.GET.get('cursor', ''))
+    if cursor is not None:
+        page = _keyset_page_from_cursor(queryset, cursor, per_page)
+        # A stale cursor past either end of the feed lands on page one.
+        if page.object_list:
+            return page
+    rows = list(queryset.order_by('-pub_date', '-pk')[:per_page + 1])
+    return KeysetPage(rows[:per_page], len(rows) > per_page, False)
+
+
+def get_feed_page(request, queryset, per_page=10):
+    if getattr(settings, 'BLOG_KEYSET_PAGINATION', False):
+        return get_keyset_page(request, queryset, per_page)
+    return get_paginator(request, queryset, per_page)
+
+
+def _hide_deep_replies(rows, max_depth):
+    """Drop replies below max_depth, flagging the comments they answer."""
+    shown = []
+    for comment in rows:
+        if comment.depth > max_depth:
+            if shown and shown[-1].pk == comment.parent_pk:
+                shown[-1].has_hidden_replies = True
+            continue
+        shown.append(comment)
+    return shown
+
+
+def _read_thread(queryset, direction, path, per_page):
+    """Return (rows, more, beyond): per_page rows in display order.
+
+    `beyond` holds the row just after them, if any, in either direction.
+    """
+    if direction == CURSOR_PREVIOUS:
+        rows = list(
+            queryset.filter(path__lt=path).order_by('-path')[:per_page + 1]
+        )
+        beyond = list(
+            queryset.filter(path__gte=path).order_by('path')[:1]
+        ) if rows else []
+        return rows[:per_page][::-1], len(rows) > per_page, beyond
+    if direction == CURSOR_NEXT:
+        queryset = queryset.filter(path__gt=path)
+    rows = list(queryset.order_by('path')[:per_page + 1])
+    return rows[:per_page], len(rows) > per_page, rows[per_page:]
+
+
+def get_comments_page(queryset, cursor=None, per_page=None, max_depth=None):
+    """Comments in thread order, N at a time, keyed on their path.
+
+    Sorting by path lists each thread depth-first, replies after the
+    comment they answer, so every page is a range scan of the
+    (post, path) index, whatever the thread length. A next cursor moves
+    further down the threads and a previous one back up.
+
+    With max_depth, deeper replies are not rendered: only one level past
+    it is read, to mark the comments whose replies are hidden. A page
+    made only of hidden replies reads on until it has something to show.
+    """
+    per_page = per_page or settings.BLOG_COMMENTS_PER_PAGE
+    if max_depth is not None:
+        queryset = queryset.annotate(path_length=Length('path')).filter(
+            path_length__lte=(max_depth + 2) * COMMENT_PATH_STEP
+        )
+    direction, path = (
+        decode_thread_cursor(cursor) if cursor else None
+    ) or (None, None)
+    backwards, from_start = direction == CURSOR_PREVIOUS, direction is None
+    read, shown, more = [], [], True
+    while not shown and more:
+        if read:
+            direction = CURSOR_PREVIOUS if backwards else CURSOR_NEXT
+            path = read[0].path if backwards else read[-1].path
+        rows, more, beyond = _read_thread(queryset, direction, path, per_page)
+        read = rows + read if backwards else read + rows
+        if max_depth is None:
+            shown = rows
+        else:
+            # The row beyond, if a hidden reply, still flags its parent.
+            shown = _hide_deep_replies(rows + beyond, max_depth)
+            shown = [comment for comment in shown if comment in rows]
+    if not read:
+        return ThreadPage([], False, False)
+    if backwards:
+        has_next, has_previous = True, more
+    else:
+        has_next, has_previous = more, not from_start
+    return ThreadPage(
+        shown, has_next, has_previous, read[0].path, read[-1].path
+    )
+
+
+def fts_query(text):
+    """Quote every word so user input is never parsed as FTS5 syntax."""
+    words = text.split()
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def search_posts(queryset, text):
+    """Filter posts matching `text`, best bm25 rank first."""
+    query = fts_query(text)
+    if not query:
+        return queryset.none()
+    if connection.vendor != 'sqlite':
+        return queryset.filter(
+            Q(title__icontains=text) | Q(text__icontains=text)
+        ).order_by('-pub_date')
+    return queryset.extra(
+        tables=['blog_post_fts'],
+        where=[
+            'blog_post_fts.rowid = blog_post.id',
+            'blog_post_fts MATCH %s',
+        ],
+        params=[query],
+        select={'rank': 'bm25(blog_post_fts)'},
+    ).order_by('rank', '-pub_date')
+
+
 def is_post_visible_to_user(post, user):
     now = timezone.now()
-    return (post.is_published and post.pub_date <= now) or post.author == user
\ No newline at end of file
+    return (post.is_published and post.pub_date <= now) or post.author == user
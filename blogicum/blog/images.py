@@ -0,0 +1,174 @@
+"""Derived sizes of post images, produced off the request path.
+
+Post.image_variants is a manifest of the current Post.image: its
+dimensions, byte size and format, recorded when the image is saved, and
+the variants generated for it so far. Templates and the admin read it
+instead of the filesystem and fall back to the original until a variant
+is listed there.
+"""
+import base64
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.utils import timezone
+from PIL import Image, ImageFilter, features
+
+from .caching import bump_page_cache_generation
+from .storage import post_image_storage
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def variant_name(name, width, image_format):
+    directory, filename = os.path.split(name)
+    if image_format == 'WEBP':
+        filename = os.path.splitext(filename)[0] + '.webp'
+    return os.path.join(directory, 'thumbs', str(width), filename)
+
+
+def variant_widths(original_width):
+    widths = set(settings.BLOG_IMAGE_WIDTHS)
+    widths.update(settings.BLOG_THUMBNAIL_WIDTHS.values())
+    return sorted(
+        (width for width in widths if width < original_width), reverse=True
+    )
+
+
+def _save_image(image, target, image_format):
+    buffer = BytesIO()
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    image.save(buffer, format=image_format, optimize=True)
+    if default_storage.exists(target):
+        default_storage.delete(target)
+    return default_storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def image_metadata(name):
+    """Manifest of `name` without variants, read from the image header."""
+    with post_image_storage.open(name) as source, Image.open(source) as img:
+        return {
+            'source': name,
+            'width': img.width,
+            'height': img.height,
+            'size': post_image_storage.size(name),
+            'format': img.format.lower(),
+        }
+
+
+def has_variants(manifest, name):
+    return (manifest.get('source') == name
+            and 'variants' in manifest and 'placeholder' in manifest)
+
+
+def placeholder_uri(image):
+    """A few-pixel blurred JPEG of `image` as a data: URI."""
+    tiny = image.convert('RGB')
+    tiny.thumbnail(
+        (settings.BLOG_PLACEHOLDER_SIZE, settings.BLOG_PLACEHOLDER_SIZE)
+    )
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    tiny.save(buffer, format='JPEG', quality=50)
+    return 'data:image/jpeg;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def build_variants(name):
+    """Write the width ladder of `name` in its own format and in WebP.
+
+    Returns the manifest stored in Post.image_variants, including the
+    inline placeholder cards show until the real image has loaded.
+    """
+    with post_image_storage.open(name) as source, Image.open(source) as img:
+        image_format = img.format
+        formats = [image_format]
+        if image_format != 'WEBP' and features.check('webp'):
+            formats.append('WEBP')
+        variants = {fmt.lower(): [] for fmt in formats}
+        resized = img
+        # Each step shrinks the previous one instead of the full original.
+        for width in variant_widths(img.width):
+            resized = resized.resize(
+                (width, max(1, round(img.height * width / img.width))),
+                Image.Resampling.LANCZOS,
+            )
+            for fmt in formats:
+                variants[fmt.lower()].append(
+                    [width, _save_image(
+                        resized, variant_name(name, width, fmt), fmt
+                    )]
+                )
+        return {
+            'source': name,
+            'width': img.width,
+            'height': img.height,
+            'size': post_image_storage.size(name),
+            'format': image_format.lower(),
+            'variants': variants,
+            # From the smallest step, so the original is not walked again.
+            'placeholder': placeholder_uri(resized),
+        }
+
+
+def generate_thumbnails(post_id):
+    """Render the variants of the post's image and record them.
+
+    Return False if that failed; the error is logged.
+    """
+    from .models import Post
+
+    try:
+        name = Post.objects.filter(pk=post_id).values_list(
+            'image', flat=True
+        ).first()
+        if not name:
+            return True
+        # Identical uploads share a file, so they can share its variants.
+        manifest = next((
+            manifest for manifest in Post.objects.filter(
+                image=name
+            ).exclude(pk=post_id).values_list('image_variants', flat=True)
+            if has_variants(manifest, name)
+        ), None) or build_variants(name)
+        # Only record the result if the image was not replaced meanwhile.
+        Post.objects.filter(pk=post_id, image=name).update(
+            image_variants=manifest,
+            updated_at=timezone.now(),
+        )
+        bump_page_cache_generation()
+    except Exception:
+        logger.exception('Thumbnail generation failed for post %s', post_id)
+        return False
+    return True
+
+
+def generate_thumbnails_in_worker(post_id):
+    try:
+        return generate_thumbnails(post_id)
+    finally:
+        # Worker threads own their connections; do not leave them open.
+        connections.close_all()
+
+
+def schedule_thumbnails(post_id):
+    """Hand the post to the worker pool, or run inline without workers."""
+    global _executor
+    workers = settings.BLOG_IMAGE_WORKERS
+    if not workers:
+        generate_thumbnails(post_id)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='blog-images'
+        )
+    _executor.submit(generate_thumbnails_in_worker, post_id)
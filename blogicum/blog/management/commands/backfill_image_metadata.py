@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.caching import bump_page_cache_generation
+from blog.images import image_metadata
+from blog.models import Post
+
+
+def has_metadata(manifest, name):
+    return manifest.get('source') == name and {
+        'height', 'size'
+    } <= manifest.keys()
+
+
+def merged_manifest(manifest, name, metadata):
+    """The manifest recording `metadata` for the image `name`."""
+    if manifest.get('source') == name:
+        # Keep the variants already generated for this image.
+        return {**manifest, **metadata}
+    return metadata
+
+
+class Command(BaseCommand):
+    help = ('Record dimensions, byte size and format of post images '
+            'saved before they were kept in the manifest.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def read_metadata(self, name, metadata):
+        # Identical uploads share a file; read each one once.
+        if name not in metadata:
+            try:
+                metadata[name] = image_metadata(name)
+            except Exception as exc:
+                metadata[name] = None
+                self.stderr.write(f'{name}: {exc}')
+        return metadata[name]
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk').only(
+            'pk', 'image', 'image_variants'
+        )
+        last_pk, updated, failed = 0, 0, 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            metadata, changed = {}, []
+            for post in batch:
+                name, manifest = post.image.name, post.image_variants
+                if has_metadata(manifest, name):
+                    continue
+                found = self.read_metadata(name, metadata)
+                if found is None:
+                    failed += 1
+                    continue
+                post.image_variants = merged_manifest(manifest, name, found)
+                post.updated_at = timezone.now()
+                changed.append(post)
+            Post.objects.bulk_update(changed, ['image_variants', 'updated_at'])
+            updated += len(changed)
+        if updated:
+            bump_page_cache_generation()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recorded image metadata for {updated} post(s), '
+            f'{failed} unreadable.'
+        ))
@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.sqlite import apply_pragmas
+
+SCHEMA = [
+    'CREATE TABLE post (id INTEGER PRIMARY KEY, comment_count INTEGER)',
+    'CREATE TABLE comment (id INTEGER PRIMARY KEY, post_id INTEGER,'
+    ' text TEXT)',
+    'CREATE INDEX comment_post ON comment (post_id, id)',
+]
+POSTS = 100
+
+
+def _connect(path, pragmas):
+    # Autocommit mode, so transactions begin where the statements say.
+    connection = sqlite3.connect(
+        path, timeout=5, isolation_level=None, check_same_thread=False
+    )
+    apply_pragmas(connection.cursor(), pragmas)
+    return connection
+
+
+def _prepare(path, pragmas, rows):
+    connection = _connect(path, pragmas)
+    for statement in SCHEMA:
+        connection.execute(statement)
+    connection.execute('BEGIN')
+    connection.executemany(
+        'INSERT INTO post VALUES (?, 0)', ((i,) for i in range(POSTS))
+    )
+    connection.executemany(
+        'INSERT INTO comment (post_id, text) VALUES (?, ?)',
+        ((i % POSTS, 'x' * 200) for i in range(rows)),
+    )
+    connection.execute('COMMIT')
+    connection.close()
+
+
+def _write(connection, i):
+    # What add_comment does: the comment and its post's counter.
+    connection.execute('BEGIN')
+    try:
+        connection.execute(
+            'INSERT INTO comment (post_id, text) VALUES (?, ?)',
+            (i % POSTS, 'x' * 200),
+        )
+        connection.execute(
+            'UPDATE post SET comment_count = comment_count + 1'
+            ' WHERE id = ?', (i % POSTS,)
+        )
+        connection.execute('COMMIT')
+    except sqlite3.OperationalError:
+        connection.execute('ROLLBACK')
+        raise
+
+
+def _read(connection, i):
+    # A page of a post's comments.
+    connection.execute(
+        'SELECT id, text FROM comment WHERE post_id = ?'
+        ' ORDER BY id DESC LIMIT 50', (i % POSTS,)
+    ).fetchall()
+
+
+def _worker(path, pragmas, operation, deadline, results):
+    connection = _connect(path, pragmas)
+    done = failed = 0
+    while time.monotonic() < deadline:
+        try:
+            operation(connection, done + failed)
+            done += 1
+        except sqlite3.OperationalError:
+            failed += 1
+    connection.close()
+    results.append((operation, done, failed))
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare concurrent SQLite write/read throughput with default '
+        'pragmas and BLOG_SQLITE_PRAGMAS, on a scratch database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--rows', type=int, default=10000)
+
+    def run(self, path, pragmas, options):
+        _prepare(path, pragmas, options['rows'])
+        deadline = time.monotonic() + options['seconds']
+        results = []
+        threads = [
+            threading.Thread(
+                target=_worker,
+                args=(path, pragmas, operation, deadline, results),
+            )
+            for operation, count in (
+                (_write, options['writers']), (_read, options['readers'])
+            )
+            for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        totals = {}
+        for operation, done, failed in results:
+            ok, errors = totals.get(operation, (0, 0))
+            totals[operation] = ok + done, errors + failed
+        return totals.get(_write, (0, 0)), totals.get(_read, (0, 0))
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        with tempfile.TemporaryDirectory() as directory:
+            for label, pragmas in (
+                ('default', {}),
+                ('configured', settings.BLOG_SQLITE_PRAGMAS),
+            ):
+                path = os.path.join(directory, f'{label}.sqlite3')
+                writes, reads = self.run(path, pragmas, options)
+                self.stdout.write(
+                    f'{label:>10}: {writes[0] / seconds:9.1f} writes/s'
+                    f' ({writes[1]} locked), {reads[0] / seconds:9.1f}'
+                    f' reads/s ({reads[1]} locked)'
+                )
@@ -0,0 +1,126 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.storage import post_image_storage
+
+THUMBS = 'thumbs'
+
+
+class Command(BaseCommand):
+    help = ('Delete post images no post refers to, together with their '
+            'size variants.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--grace', type=int, default=settings.BLOG_MEDIA_DELETE_GRACE,
+            help='Keep files modified less than this many seconds ago.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be deleted.',
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.cutoff = time.time() - options['grace']
+        self.batch, self.deleted, self.freed = [], 0, 0
+        # Both sides are visited in the same (binary) order, so the
+        # difference is a single merge pass: neither the directory tree
+        # nor the image column is ever held in memory as a whole.
+        self.references = Post.objects.exclude(image='').order_by(
+            'image'
+        ).values_list('image', flat=True).distinct().iterator(
+            chunk_size=options['batch_size']
+        )
+        self.reference = next(self.references, None)
+
+        upload_to = Post._meta.get_field('image').upload_to
+        if os.path.isdir(post_image_storage.path(upload_to)):
+            self.walk(upload_to)
+        self.flush()
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {self.deleted} orphaned file(s), {self.freed} bytes.'
+        ))
+
+    def is_referenced(self, name):
+        while self.reference is not None and self.reference < name:
+            self.reference = next(self.references, None)
+        return self.reference == name
+
+    def walk(self, directory):
+        """Visit `directory` in the order the database sorts names in.
+
+        Variants live in <directory>/thumbs/<width>/ and are kept exactly
+        when an original with the same stem in <directory> is kept.
+        """
+        with os.scandir(post_image_storage.path(directory)) as entries:
+            entries = sorted(
+                entries, key=lambda e: e.name + ('/' if e.is_dir() else '')
+            )
+        kept_stems, thumbs = set(), None
+        for entry in entries:
+            name = f'{directory}/{entry.name}'
+            if entry.is_dir():
+                if entry.name == THUMBS:
+                    thumbs = name
+                else:
+                    self.walk(name)
+                continue
+            stat = entry.stat()
+            if self.is_referenced(name) or stat.st_mtime > self.cutoff:
+                kept_stems.add(os.path.splitext(entry.name)[0])
+            else:
+                self.collect(name, stat.st_size)
+        if thumbs:
+            self.walk_variants(thumbs, kept_stems)
+
+    def walk_variants(self, directory, kept_stems):
+        for root, _, files in os.walk(post_image_storage.path(directory)):
+            for filename in files:
+                path = os.path.join(root, filename)
+                stat = os.stat(path)
+                if (os.path.splitext(filename)[0] in kept_stems
+                        or stat.st_mtime > self.cutoff):
+                    continue
+                self.collect(
+                    os.path.relpath(path, post_image_storage.location)
+                    .replace(os.sep, '/'),
+                    stat.st_size,
+                )
+
+    def collect(self, name, size):
+        self.batch.append((name, size))
+        if len(self.batch) >= self.options['batch_size']:
+            self.flush()
+
+    def flush(self):
+        batch, self.batch = self.batch, []
+        if not batch:
+            return
+        # A post may have taken one of the files since the walk saw it.
+        taken = set(Post.objects.filter(
+            image__in=[name for name, _ in batch]
+        ).values_list('image', flat=True))
+        for name, size in batch:
+            if name in taken:
+                continue
+            if not self.options['dry_run']:
+                path = post_image_storage.path(name)
+                try:
+                    if os.path.getmtime(path) > self.cutoff:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+            self.deleted += 1
+            self.freed += size
+            if self.options['verbosity'] > 1:
+                self.stdout.write(name)
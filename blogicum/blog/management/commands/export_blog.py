@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.export import iter_export, export_queryset
+from blog.forms import ExportForm
+
+
+class Command(BaseCommand):
+    help = 'Stream posts or comments as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=('posts', 'comments'))
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'), default='ndjson'
+        )
+        parser.add_argument('--since', help='YYYY-MM-DD, inclusive.')
+        parser.add_argument('--until', help='YYYY-MM-DD, inclusive.')
+        parser.add_argument('--category', help='Category slug.')
+        parser.add_argument(
+            '-o', '--output', help='File to write; stdout by default.'
+        )
+
+    def handle(self, *args, **options):
+        form = ExportForm({
+            key: options[key]
+            for key in ('format', 'since', 'until', 'category')
+            if options[key]
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        queryset = export_queryset(
+            options['kind'],
+            since=form.cleaned_data['since'],
+            until=form.cleaned_data['until'],
+            category=form.cleaned_data['category'],
+        )
+        chunks = iter_export(options['kind'], options['format'], queryset)
+        if options['output']:
+            with open(
+                options['output'], 'w', encoding='utf-8', newline=''
+            ) as output:
+                output.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
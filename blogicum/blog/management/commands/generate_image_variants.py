@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.images import generate_thumbnails_in_worker, has_variants
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Build missing or stale size/WebP variants of post images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Rebuild variants even when the manifest is current.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.BLOG_IMAGE_WORKERS or 1
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk').values_list(
+            'pk', 'image', 'image_variants'
+        )
+        last_pk, built, failed = 0, 0, 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch = list(
+                    posts.filter(pk__gt=last_pk)[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+                # Finish a batch before reading the next, so the pool's
+                # queue never holds more than one batch of jobs.
+                jobs = {
+                    pool.submit(generate_thumbnails_in_worker, pk): pk
+                    for pk, image, manifest in batch
+                    if options['all'] or not has_variants(manifest, image)
+                }
+                for job in as_completed(jobs):
+                    error = job.exception()
+                    if error is None and job.result():
+                        built += 1
+                        continue
+                    failed += 1
+                    self.stderr.write(
+                        f'Post {jobs[job]}: '
+                        f'{error or "variants not built, see the log"}'
+                    )
+        self.stdout.write(self.style.SUCCESS(
+            f'Built image variants for {built} post(s), {failed} failed.'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the FTS5 search index over post titles and texts.'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Full-text search index exists only on SQLite.')
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')"
+            )
+            cursor.execute(
+                "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('optimize')"
+            )
+            cursor.execute('SELECT COUNT(*) FROM blog_post_fts')
+            (indexed,) = cursor.fetchone()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {indexed} post(s).'
+        ))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Repair drift between Post.comment_count and actual comments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many posts have drifted.',
+        )
+
+    def handle(self, *args, **options):
+        actual = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(n=Count('pk')).values('n')
+        drifted = Post.objects.annotate(
+            actual=Coalesce(
+                Subquery(actual, output_field=IntegerField()), 0
+            )
+        ).exclude(comment_count=F('actual')).values_list('pk', 'actual')
+
+        # Walk the drifted posts in primary key order, one batch at a time,
+        # so the scan never holds a cursor open over rows being updated.
+        batch_size = options['batch_size']
+        last_pk, repaired = 0, 0
+        while True:
+            batch = list(
+                drifted.filter(pk__gt=last_pk).order_by('pk')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            if not options['dry_run']:
+                with transaction.atomic():
+                    Post.objects.bulk_update(
+                        [Post(pk=pk, comment_count=n) for pk, n in batch],
+                        ['comment_count'],
+                    )
+            repaired += len(batch)
+
+        verb = 'Would repair' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} comment_count on {repaired} post(s).'
+        ))
@@ -0,0 +1,161 @@
+"""Serving uploaded media: validators, byte ranges and proxy handoff.
+
+Content-addressed originals (see storage.py) never change under their
+name, so they are sent with an immutable far-future Cache-Control.
+Anything else gets BLOG_MEDIA_MAX_AGE, variants under thumbs/ included:
+they share the original's name and are rewritten in place on rebuilds.
+
+With BLOG_MEDIA_SENDFILE set, the view still answers conditional
+requests itself but leaves the byte copying, ranges included, to the
+front proxy through X-Accel-Redirect (nginx) or X-Sendfile (Apache).
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+CHUNK_SIZE = 64 * 1024
+
+_HASHED_NAME = re.compile(r'^[0-9a-f]{64}(\.[A-Za-z0-9]+)?$')
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def media_file(path):
+    """Return (normalised path, absolute path, stat) or raise Http404."""
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Media file not found')
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404('Media file not found')
+    if not os.path.isfile(fullpath):
+        raise Http404('Media file not found')
+    return path, fullpath, stat
+
+
+def is_content_addressed(path):
+    if 'thumbs' in path.split('/')[:-1]:
+        return False
+    return bool(_HASHED_NAME.match(posixpath.basename(path)))
+
+
+def media_etag(path, stat):
+    if is_content_addressed(path):
+        # The name is the content; mtime is refreshed on duplicate uploads.
+        return '"%s"' % hashlib.md5(path.encode()).hexdigest()
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+def cache_control(path):
+    if is_content_addressed(path):
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f'public, max-age={settings.BLOG_MEDIA_MAX_AGE}'
+
+
+def parse_range(header, size):
+    """Return the (start, end) byte span requested by `header`.
+
+    None means the header is absent, malformed or asks for several
+    ranges; the whole file is sent then. An unsatisfiable range raises
+    ValueError.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        length = int(last)
+        if not length or not size:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        if last and int(last) < start:
+            return None
+        raise ValueError(header)
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def iter_span(fullpath, start, end):
+    with open(fullpath, 'rb') as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def sendfile_response(path, fullpath):
+    mode = settings.BLOG_MEDIA_SENDFILE
+    response = HttpResponse()
+    if mode == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.BLOG_MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + path
+        )
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = fullpath
+    else:
+        raise ValueError(f'Unknown BLOG_MEDIA_SENDFILE mode: {mode!r}')
+    return response
+
+
+def file_response(request, path, fullpath, stat, etag):
+    """The body part of a media response: full file or a single range."""
+    if settings.BLOG_MEDIA_SENDFILE:
+        return sendfile_response(path, fullpath)
+    size = stat.st_size
+    try:
+        span = parse_range(request.META.get('HTTP_RANGE'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if span is None or not if_range_matches(request, etag, stat.st_mtime):
+        return FileResponse(open(fullpath, 'rb'))
+    start, end = span
+    response = StreamingHttpResponse(
+        iter_span(fullpath, start, end), status=206
+    )
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(end - start + 1)
+    return response
+
+
+def set_media_headers(response, path, stat, etag):
+    content_type, encoding = mimetypes.guess_type(path)
+    response['Content-Type'] = content_type or 'application/octet-stream'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = cache_control(path)
+    return response
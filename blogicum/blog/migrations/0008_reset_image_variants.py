@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:05
+
+from django.db import migrations
+
+
+def reset_image_variants(apps, schema_editor):
+    # The manifest now lists a width ladder per format; rebuild with
+    # `manage.py generate_image_variants`. Until then the originals are used.
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.update(image_variants={})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            reset_image_variants, migrations.RunPython.noop
+        ),
+    ]
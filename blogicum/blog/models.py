@@ -1,8 +1,15 @@
+import hashlib
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models import Count
-from .functions import get_published_posts, comment_count
+from .functions import (
+    COMMENT_PATH_END, COMMENT_PATH_STEP, comment_path_segment,
+    get_published_posts,
+)
+from .storage import post_image_storage
 
 User = get_user_model()
 
@@ -16,6 +23,10 @@ class PublishedModel(models.Model):
         auto_now_add=True,
         verbose_name='Добавлено'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено'
+    )
 
     def __str__(self):
         if hasattr(self, 'title'):
@@ -58,7 +69,10 @@ class Location(PublishedModel):
 
 class PostQuerySet(models.QuerySet):
     def published(self):
-        return comment_count(get_published_posts(self))
+        return get_published_posts(self)
+
+    def with_related(self):
+        return self.select_related('author', 'category', 'location')
 
 class Post(PublishedModel):
     title = models.CharField(max_length=256, verbose_name='Заголовок')
@@ -87,9 +101,21 @@ class Post(PublishedModel):
     )
     image = models.ImageField(
         upload_to='posts_images',
+        storage=post_image_storage,
         blank=True,
         verbose_name='Изображение',
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Производные изображения'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
 
     objects = PostQuerySet.as_manager()
 
@@ -98,6 +124,50 @@ class Post(PublishedModel):
         verbose_name_plural = 'Публикации'
         ordering = ['-pub_date']
         default_related_name = 'posts'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_feed_idx',
+                condition=Q(is_published=True),
+            ),
+            models.Index(
+                fields=['category', '-pub_date', '-id'],
+                name='post_category_feed_idx',
+                condition=Q(is_published=True),
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx',
+            ),
+            models.Index(fields=['image'], name='post_image_idx'),
+        ]
+
+    @property
+    def card_version(self):
+        """Stamp of everything includes/post_card.html renders.
+
+        Derived from the post and its already selected relations, so it
+        changes with them even when they are edited through
+        QuerySet.update() and no signal fires.
+        """
+        category, location = self.category, self.location
+        parts = (
+            self.title, self.text, self.pub_date.isoformat(),
+            self.is_published, self.image.name, self.image_variants,
+            self.comment_count,
+            self.author.username,
+            category and (
+                category.slug, category.title, category.is_published
+            ),
+            location and (location.name, location.is_published),
+        )
+        return hashlib.md5(repr(parts).encode()).hexdigest()
+
+class CommentQuerySet(models.QuerySet):
+    def subtree(self, path):
+        """The comment at `path` and all its replies, as one range."""
+        return self.filter(path__gte=path, path__lt=path + COMMENT_PATH_END)
+
 
 class Comment(models.Model):
     text = models.TextField(verbose_name='Текст комментария')
@@ -111,6 +181,53 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    path = models.CharField(
+        max_length=255,
+        default='',
+        editable=False,
+        verbose_name='Путь в ветке'
+    )
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ('created_at',)
+        indexes = [
+            models.Index(
+                fields=['post', 'created_at'],
+                name='comment_post_created_idx',
+            ),
+            models.Index(
+                fields=['post', 'path'],
+                name='comment_post_path_idx',
+            ),
+        ]
+
+    @property
+    def depth(self):
+        return max(len(self.path) // COMMENT_PATH_STEP - 1, 0)
+
+    @property
+    def parent_pk(self):
+        if len(self.path) <= COMMENT_PATH_STEP:
+            return None
+        return int(self.path[-2 * COMMENT_PATH_STEP:-COMMENT_PATH_STEP], 36)
+
+    def reply_to(self, parent):
+        """Place this unsaved comment under `parent`.
+
+        Replies deeper than BLOG_COMMENT_MAX_DEPTH become siblings of
+        their parent instead, so paths stay within the column.
+        """
+        prefix = parent.path
+        if parent.depth + 1 > settings.BLOG_COMMENT_MAX_DEPTH:
+            prefix = prefix[:-COMMENT_PATH_STEP]
+        self.path = prefix
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            # The last segment is the id, known only after the insert.
+            self.path += comment_path_segment(self.pk)
+            type(self).objects.filter(pk=self.pk).update(path=self.path)
@@ -0,0 +1,113 @@
+"""Set-based moderation behind the admin actions.
+
+Every operation is a single UPDATE or a series of bounded DELETEs and
+returns the number of rows it touched; no model instance is loaded, so
+model signals do not fire. What they would have done is done here in
+bulk: Post.updated_at, comment counters and the page cache. Images of
+deleted posts are left to the collect_orphaned_media command. Replies to
+a deleted comment are kept and move up a level, into its place.
+"""
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Value
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
+
+from .caching import bump_page_cache_generation
+from .functions import COMMENT_PATH_STEP
+from .models import Comment, Post
+
+DELETE_CHUNK_SIZE = 1000
+
+
+def set_published(queryset, is_published):
+    count = queryset.update(
+        is_published=is_published, updated_at=timezone.now()
+    )
+    bump_page_cache_generation()
+    return count
+
+
+def move_to_category(posts, category):
+    count = posts.update(category=category, updated_at=timezone.now())
+    bump_page_cache_generation()
+    return count
+
+
+def _chunks(queryset):
+    """Successive querysets of at most DELETE_CHUNK_SIZE rows to delete."""
+    while True:
+        yield queryset.model.objects.filter(pk__in=Subquery(
+            queryset.order_by('pk').values('pk')[:DELETE_CHUNK_SIZE]
+        ))
+
+
+def _raw_delete(queryset):
+    # A plain DELETE ... WHERE, without the collector fetching the rows.
+    return queryset._raw_delete(queryset.db)
+
+
+def _lift_replies(deleted):
+    """Move the replies of deleted comments up into their place.
+
+    `deleted` holds (post_id, path) pairs. The deepest go first, so the
+    replies of a deleted reply to a deleted comment rise two levels.
+    """
+    for post_id, path in sorted(deleted, key=lambda d: -len(d[1])):
+        if not path:
+            continue
+        Comment.objects.filter(post_id=post_id).subtree(path).update(
+            path=Concat(
+                Value(path[:-COMMENT_PATH_STEP]),
+                Substr('path', len(path) + 1),
+            )
+        )
+
+
+def delete_comments(comments):
+    """Delete `comments` chunk by chunk, keeping comment_count in step."""
+    deleted = 0
+    for chunk in _chunks(comments):
+        with transaction.atomic():
+            paths = list(chunk.values_list('post_id', 'path'))
+            on_post = chunk.filter(post=OuterRef('pk'))
+            Post.objects.filter(Exists(on_post)).update(
+                comment_count=F('comment_count') - Subquery(
+                    on_post.order_by().values('post').annotate(
+                        n=Count('pk')
+                    ).values('n')
+                ),
+                updated_at=timezone.now(),
+            )
+            count = _raw_delete(chunk)
+            _lift_replies(paths)
+        if not count:
+            break
+        deleted += count
+    bump_page_cache_generation()
+    return deleted
+
+
+def delete_posts(posts):
+    """Delete `posts` and their comments; returns (posts, comments)."""
+    deleted_posts = deleted_comments = 0
+    for chunk in _chunks(posts):
+        with transaction.atomic():
+            deleted_comments += _raw_delete(
+                Comment.objects.filter(post__in=chunk)
+            )
+            count = _raw_delete(chunk)
+        if not count:
+            break
+        deleted_posts += count
+    bump_page_cache_generation()
+    return deleted_posts, deleted_comments
+
+
+def delete_author_content(author_ids):
+    """Delete every post and comment of the given authors.
+
+    Returns (posts, comments), comments including those on the posts.
+    """
+    comments = delete_comments(Comment.objects.filter(author__in=author_ids))
+    posts, cascaded = delete_posts(Post.objects.filter(author__in=author_ids))
+    return posts, comments + cascaded
@@ -0,0 +1,80 @@
+"""Reads from replica databases for the read-mostly views.
+
+Views decorated with read_from_replicas run their queries against one of
+BLOG_REPLICA_DATABASES, picked once per request; everything else,
+and every write, uses the primary. A replica can lag behind, so a client
+whose request wrote anything is pinned to the primary by a cookie for
+BLOG_REPLICA_STICKY_SECONDS and sees its own writes.
+"""
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'blog_primary'
+
+_read_alias = ContextVar('blog_read_alias', default=None)
+_wrote = ContextVar('blog_wrote', default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        wrote = _wrote.get()
+        if wrote is not None:
+            wrote.append(model)
+        instance = hints.get('instance')
+        if (instance is not None
+                and instance._state.db in settings.BLOG_REPLICA_DATABASES):
+            return DEFAULT_DB_ALIAS
+        # Otherwise the instance's own database, or the primary.
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's rows, so objects may mix freely.
+        aliases = {DEFAULT_DB_ALIAS, *settings.BLOG_REPLICA_DATABASES}
+        if {obj1._state.db, obj2._state.db} <= aliases:
+            return True
+        return None
+
+
+def read_from_replicas(view):
+    """Run a GET view against a replica unless the client is pinned."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        replicas = settings.BLOG_REPLICA_DATABASES
+        if (not replicas or request.method not in ('GET', 'HEAD')
+                or PIN_COOKIE in request.COOKIES):
+            return view(request, *args, **kwargs)
+        token = _read_alias.set(random.choice(replicas))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """Pin clients to the primary for a while after they write."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _wrote.set([])
+        try:
+            response = self.get_response(request)
+            wrote = bool(_wrote.get())
+        finally:
+            _wrote.reset(token)
+        if wrote and settings.BLOG_REPLICA_DATABASES:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.BLOG_REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,119 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .caching import bump_page_cache_generation
+from .images import has_variants, image_metadata, schedule_thumbnails
+from .storage import release_image
+from .models import Category, Comment, Location, Post
+
+logger = logging.getLogger(__name__)
+
+# User fields printed on the cached pages.
+NAME_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1,
+            updated_at=timezone.now(),
+        )
+    else:
+        Post.objects.filter(pk=instance.post_id).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1,
+        updated_at=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Post)
+def refresh_image_variants(sender, instance, **kwargs):
+    name = instance.image.name
+    if name and instance.image_variants.get('source') != name:
+        try:
+            instance.image_variants = image_metadata(name)
+        except Exception:
+            logger.exception('Cannot read image metadata of post %s',
+                             instance.pk)
+            instance.image_variants = {}
+        Post.objects.filter(pk=instance.pk).update(
+            image_variants=instance.image_variants
+        )
+    if name and not has_variants(instance.image_variants, name):
+        transaction.on_commit(lambda: schedule_thumbnails(instance.pk))
+    elif not name and instance.image_variants:
+        instance.image_variants = {}
+        Post.objects.filter(pk=instance.pk).update(image_variants={})
+
+
+@receiver(post_init, sender=Post)
+def remember_loaded_image(sender, instance, **kwargs):
+    instance._loaded_image = (instance.image.name, instance.image_variants)
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    name, manifest = instance._loaded_image
+    if name and name != instance.image.name:
+        transaction.on_commit(lambda: release_image(name, manifest))
+    instance._loaded_image = (instance.image.name, instance.image_variants)
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    name, manifest = instance.image.name, instance.image_variants
+    transaction.on_commit(lambda: release_image(name, manifest))
+
+
+@receiver(pre_save, sender=get_user_model())
+def touch_posts_on_rename(sender, instance, update_fields=None, **kwargs):
+    """Move Post.updated_at of the posts showing a renamed user.
+
+    Feeds and post pages print authors' and commenters' usernames, and
+    their conditional GET validators see changes through updated_at. The
+    profile page also prints the full name, so a change of either name
+    invalidates the anonymous page cache; other saves, such as the
+    last_login update on every login, leave it alone.
+    """
+    if instance.pk is None or (
+        update_fields is not None and not set(update_fields) & NAME_FIELDS
+    ):
+        return
+    stored = sender.objects.filter(pk=instance.pk).values(
+        *NAME_FIELDS
+    ).first()
+    if stored is None:
+        return
+    if stored['username'] != instance.username:
+        Post.objects.filter(
+            Q(author=instance.pk)
+            | Q(pk__in=Comment.objects.filter(
+                author=instance.pk
+            ).values('post'))
+        ).update(updated_at=timezone.now())
+    if any(stored[name] != getattr(instance, name) for name in NAME_FIELDS):
+        bump_page_cache_generation()
+
+
+def invalidate_page_cache(sender, **kwargs):
+    bump_page_cache_generation()
+
+
+for model in (Post, Category, Location, Comment):
+    post_save.connect(invalidate_page_cache, sender=model)
+    post_delete.connect(invalidate_page_cache, sender=model)
@@ -0,0 +1,149 @@
+"""Server-sent events stream of new comments, served straight over ASGI.
+
+Django 3.2 iterates streaming responses synchronously, so a long-lived
+stream would pin a thread (or block the loop) per reader. The stream is
+therefore a small ASGI application mounted in front of Django in
+blogicum/asgi.py: each reader is one coroutine waiting on its broker
+queue. Only connecting touches the database, through sync_to_async.
+
+Streams exist for publicly visible posts. Event ids are comment ids, so
+a reconnecting EventSource that sends Last-Event-ID is first replayed
+what it missed.
+"""
+import asyncio
+import json
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .events import comment_channel, comment_event, get_broker
+
+EVENTS_PATH = re.compile(r'^/posts/(?P<post_id>\d+)/events/$')
+
+
+def _missed_comments(post_id, last_event_id):
+    """None if the post is not public, else comments after the given id."""
+    from .functions import get_published_posts
+    from .models import Comment, Post
+
+    close_old_connections()
+    try:
+        if not get_published_posts(Post.objects.filter(pk=post_id)).exists():
+            return None
+        if last_event_id is None:
+            return []
+        return [
+            comment_event(comment)
+            for comment in Comment.objects.select_related('author').filter(
+                post_id=post_id, pk__gt=last_event_id
+            ).order_by('pk')[:settings.BLOG_COMMENTS_PER_PAGE]
+        ]
+    finally:
+        close_old_connections()
+
+
+def _format(event):
+    return (
+        f'id: {event["id"]}\nevent: comment\n'
+        f'data: {json.dumps(event, ensure_ascii=False)}\n\n'
+    ).encode()
+
+
+def _last_event_id(scope):
+    for name, value in scope['headers']:
+        if name == b'last-event-id':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+async def comment_events(scope, receive, send, post_id):
+    # Subscribe before looking up what was missed, so nothing published
+    # in between is lost; live copies of replayed comments are skipped.
+    subscription = get_broker().subscribe(comment_channel(post_id))
+    try:
+        missed = await sync_to_async(_missed_comments)(
+            post_id, _last_event_id(scope)
+        )
+        if missed is None:
+            await send({
+                'type': 'http.response.start', 'status': 404,
+                'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+            })
+            await send({'type': 'http.response.body', 'body': b'Not found'})
+            return
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': b'retry: 3000\n\n' + b''.join(map(_format, missed)),
+            'more_body': True,
+        })
+        await _stream(
+            subscription, receive, send, {event['id'] for event in missed}
+        )
+    finally:
+        subscription.close()
+
+
+async def _stream(subscription, receive, send, replayed):
+    # Comments can commit, and so be published, out of id order: skip
+    # only the ones already replayed, each of which arrives at most once.
+    next_event = asyncio.ensure_future(subscription.get())
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {next_event, disconnect},
+                timeout=settings.BLOG_EVENTS_KEEPALIVE,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnect in done:
+                return
+            if next_event in done:
+                event = next_event.result()
+                next_event = asyncio.ensure_future(subscription.get())
+                if event['id'] in replayed:
+                    replayed.discard(event['id'])
+                    continue
+                body = _format(event)
+            else:
+                body = b': keepalive\n\n'
+            await send({
+                'type': 'http.response.body', 'body': body, 'more_body': True,
+            })
+    finally:
+        next_event.cancel()
+        disconnect.cancel()
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+class EventStreamRouter:
+    """Send GET /posts/<id>/events/ to the SSE stream, the rest to Django."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            match = EVENTS_PATH.match(scope['path'])
+            if match:
+                return await comment_events(
+                    scope, receive, send, int(match['post_id'])
+                )
+        return await self.application(scope, receive, send)
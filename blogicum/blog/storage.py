@@ -0,0 +1,76 @@
+"""Content-addressed storage for post images.
+
+Files are named by the SHA-256 of their bytes, so identical uploads share
+one file and one URL. References are the Post rows pointing at a name;
+a file is released once the last of them lets go of it.
+"""
+import hashlib
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # _save() derives the final name from the content; equal names
+        # mean equal bytes, so there is nothing to disambiguate.
+        return name
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], digest + extension)
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        if not self.exists(name):
+            # Written aside and linked into place, so a concurrent upload
+            # of the same bytes finds either nothing or the whole file.
+            partial = super()._save(f'{name}.{uuid.uuid4().hex}.part', content)
+            try:
+                os.link(self.path(partial), self.path(name))
+                return name
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(self.path(partial))
+        # Refresh the mtime so release() treats the file as fresh.
+        os.utime(self.path(name))
+        return name
+
+
+post_image_storage = ContentAddressedStorage()
+
+
+def release_image(name, manifest=None):
+    """Delete `name` and its variants once no post references it.
+
+    Files touched within BLOG_MEDIA_DELETE_GRACE seconds are kept: a
+    concurrent upload of the same bytes may be about to reference them.
+    Those are left to the orphaned media collector.
+    """
+    from .models import Post
+
+    if not name or Post.objects.filter(image=name).exists():
+        return
+    storage = post_image_storage
+    if not storage.exists(name):
+        return
+    age = time.time() - os.path.getmtime(storage.path(name))
+    if age < settings.BLOG_MEDIA_DELETE_GRACE:
+        return
+    storage.delete(name)
+    if manifest and manifest.get('source') == name:
+        for entries in manifest.get('variants', {}).values():
+            for _, variant in entries:
+                storage.delete(variant)
@@ -0,0 +1,61 @@
+from django import template
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+register = template.Library()
+
+
+def _variants(post):
+    manifest = post.image_variants
+    if manifest.get('source') != post.image.name:
+        return {}
+    return manifest.get('variants', {})
+
+
+def _srcset(entries):
+    return ', '.join(
+        f'{default_storage.url(name)} {width}w' for width, name in entries
+    )
+
+
+@register.simple_tag
+def thumbnail_url(post, size):
+    """URL of the `size` variant of post.image, or of the original."""
+    width = settings.BLOG_THUMBNAIL_WIDTHS[size]
+    own_format = post.image_variants.get('format')
+    for variant_width, name in _variants(post).get(own_format, []):
+        if variant_width == width:
+            return default_storage.url(name)
+    return post.image.url
+
+
+@register.inclusion_tag('includes/responsive_image.html')
+def responsive_image(post, size, sizes='(max-width: 40rem) 100vw, 40rem',
+                     lazy=False):
+    """<picture> with WebP and original-format srcsets from the manifest.
+
+    A lazy image is painted over its precomputed placeholder.
+    """
+    variants = _variants(post)
+    original = (post.image_variants.get('width'), post.image.name)
+    own_format = post.image_variants.get('format')
+    srcset = webp_srcset = ''
+    if variants:
+        srcset = _srcset(variants.get(own_format, []) + [original])
+        if variants.get('webp') and own_format != 'webp':
+            webp_srcset = _srcset(variants['webp'])
+    # Intrinsic size of the original; it fixes the aspect ratio of
+    # whichever candidate the browser picks, so the layout does not shift.
+    known = post.image_variants.get('source') == post.image.name
+    return {
+        'src': thumbnail_url(post, size),
+        'srcset': srcset,
+        'webp_srcset': webp_srcset,
+        'sizes': sizes,
+        'width': known and post.image_variants.get('width'),
+        'height': known and post.image_variants.get('height'),
+        'lazy': lazy,
+        'placeholder': lazy and known and post.image_variants.get(
+            'placeholder'
+        ),
+    }
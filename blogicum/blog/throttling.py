@@ -0,0 +1,86 @@
+"""Sliding-window throttling of the write views.
+
+The check runs before the view, so a rejected request costs a few cache
+operations and at most the session lookup. Limits are per user: every
+session of a logged-in user shares one budget. Other clients are told
+apart by their session cookie, falling back to the address.
+
+Counts live in the BLOG_THROTTLE_CACHE cache alias; a file-based cache
+shares them between worker processes. Its increments are not atomic, so
+under contention the counts, and the limits, are approximate. The window
+is approximated from two fixed windows: the previous window's count,
+weighted by how much of it still overlaps the sliding one, plus the
+current window's count.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import caches
+from django.http import HttpResponse
+
+
+def _client_id(request):
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not session:
+        raw = f'a:{request.META.get("REMOTE_ADDR")}'
+    else:
+        # The user id straight from the session, without loading the user.
+        user_id = request.session.get(SESSION_KEY)
+        raw = f'u:{user_id}' if user_id else f's:{session}'
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _key(scope, client, window_index):
+    return f'blog:throttle:{scope}:{client}:{window_index}'
+
+
+def check_rate(scope, client, now=None):
+    """Count one request; return 0 if allowed, else seconds to wait."""
+    limit, window = settings.BLOG_THROTTLE_RATES[scope]
+    cache = caches[settings.BLOG_THROTTLE_CACHE]
+    now = time.time() if now is None else now
+    index, elapsed = divmod(now, window)
+    current_key = _key(scope, client, int(index))
+    previous_key = _key(scope, client, int(index) - 1)
+    counts = cache.get_many([current_key, previous_key])
+    current = counts.get(current_key, 0)
+    previous = counts.get(previous_key, 0)
+    weight = 1 - elapsed / window
+    if previous * weight + current + 1 > limit:
+        if current + 1 > limit:
+            # Into the next window, until this one has faded enough.
+            wait = window - elapsed + window * (1 - (limit - 1) / current)
+        else:
+            # Until the previous window has faded enough to make room.
+            wait = window * (1 - (limit - current - 1) / previous) - elapsed
+        return max(1, math.ceil(wait))
+    if not cache.add(current_key, 1, timeout=2 * window):
+        try:
+            cache.incr(current_key)
+        except ValueError:
+            cache.set(current_key, 1, timeout=2 * window)
+    return 0
+
+
+def throttle_writes(scope):
+    """Reject POSTs over the `scope` rate with 429 and Retry-After."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                wait = check_rate(scope, _client_id(request))
+                if wait:
+                    response = HttpResponse(
+                        'Слишком много запросов, попробуйте позже.',
+                        status=429,
+                        content_type='text/plain; charset=utf-8',
+                    )
+                    response['Retry-After'] = str(wait)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
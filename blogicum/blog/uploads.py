@@ -0,0 +1,30 @@
+"""Upload handling with a bounded memory and disk footprint.
+
+Requests up to FILE_UPLOAD_MAX_MEMORY_SIZE are buffered in memory by
+Django's own handler; larger ones are spooled to a temporary file by
+BoundedTemporaryFileUploadHandler, which stops writing once a file
+exceeds BLOG_MAX_UPLOAD_SIZE and marks it as truncated so the form can
+reject it instead of silently storing half an image.
+"""
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class BoundedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.truncated = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.BLOG_MAX_UPLOAD_SIZE:
+            self.truncated = True
+        if not self.truncated:
+            self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.truncated = self.truncated
+        return file
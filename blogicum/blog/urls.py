@@ -7,12 +7,18 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('category/<slug:category_slug>/', views.category_posts, name='category_posts'),
+    path('search/', views.search, name='search'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('edit_profile/', views.edit_profile, name='edit_profile'),
     path('posts/create/', views.create_post, name='create_post'),
     path('posts/<int:post_id>/edit/', views.edit_post, name='edit_post'),
+    path('posts/<int:post_id>/comments/', views.comments, name='comments'),
+    path('posts/<int:post_id>/comments/new/', views.new_comments, name='new_comments'),
+    path('posts/<int:post_id>/comments/<int:comment_id>/replies/', views.replies, name='replies'),
     path('posts/<int:post_id>/comment/', views.add_comment, name='add_comment'),
     path('posts/<int:post_id>/edit_comment/<int:comment_id>/', views.edit_comment, name='edit_comment'),
     path('posts/<int:post_id>/delete/', views.delete_post, name='delete_post'),
     path('posts/<int:post_id>/delete_comment/<int:comment_id>/', views.delete_comment, name='delete_comment'),
+    path('export/posts/', views.export, {'kind': 'posts'}, name='export_posts'),
+    path('export/comments/', views.export, {'kind': 'comments'}, name='export_comments'),
 ]
@@ -1,23 +1,58 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic import CreateView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.contrib.auth import get_user_model
-from django.http import Http404
+from django.conf import settings
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, JsonResponse,
+    StreamingHttpResponse,
+)
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import condition, require_safe
+from .caching import anonymous_page_cache
+from .conditional import (
+    category_etag, index_etag, post_detail_etag, post_detail_last_modified,
+    profile_etag,
+)
 from .models import Category, Post, Comment
-from .forms import PostForm, CommentForm, UserEditForm
-from .functions import get_paginator, get_published_posts, get_published_posts_with_no_filter, comment_count, is_post_visible_to_user
+from .events import comment_event, publish_comment
+from .export import iter_export, export_queryset
+from .replicas import read_from_replicas
+from . import moderation
+from .throttling import throttle_writes
+from .media import file_response, media_etag, media_file, set_media_headers
+from .forms import (
+    PostForm, CommentForm, UserEditForm, ExportForm, NewCommentsForm,
+)
+from .functions import (
+    decode_thread_cursor, get_comments_page, get_feed_page, get_paginator,
+    get_published_posts, get_published_posts_with_no_filter,
+    is_post_visible_to_user, search_posts,
+)
 
 
+@read_from_replicas
+@anonymous_page_cache
+@condition(etag_func=index_etag)
 def index(request):
-    post_list = get_published_posts_with_no_filter(Post.objects).order_by('-pub_date')
-    page_obj = get_paginator(request, post_list)
+    post_list = get_published_posts_with_no_filter(
+        Post.objects.with_related()
+    ).order_by('-pub_date')
+    page_obj = get_feed_page(request, post_list)
     return render(request, 'blog/index.html', {'page_obj': page_obj})
 
 
+@read_from_replicas
+@condition(
+    etag_func=post_detail_etag,
+    last_modified_func=post_detail_last_modified,
+)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post.objects.all(), pk=post_id)
+    post = get_object_or_404(Post.objects.with_related(), pk=post_id)
     
     if not post.category.is_published and request.user != post.author:
         raise Http404("Category not published")
@@ -26,22 +61,126 @@ def post_detail(request, post_id):
         raise Http404("Post not found")
 
     form = CommentForm()
+    reply_to = request.GET.get('reply_to', '')
     return render(
         request,
         'blog/detail.html',
-        {'post': post, 'form': form, 'comments': post.comments.all()}
+        {
+            'post': post,
+            'form': form,
+            'reply_to': reply_to if reply_to.isdigit() else None,
+            'comments': get_comments_page(
+                post.comments.select_related('author'),
+                max_depth=settings.BLOG_COMMENT_RENDER_DEPTH,
+            ),
+        }
+    )
+
+
+def _get_post_for_comments(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('category'), pk=post_id
+    )
+    if not post.category.is_published and request.user != post.author:
+        raise Http404("Category not published")
+    if not is_post_visible_to_user(post, request.user):
+        raise Http404("Post not found")
+    return post
+
+
+def comments(request, post_id):
+    """A fragment of comments around ?cursor= for the detail page."""
+    post = _get_post_for_comments(request, post_id)
+    cursor = request.GET.get('cursor', '')
+    return render(
+        request,
+        'includes/comment_list.html',
+        {
+            'post': post,
+            'comments': get_comments_page(
+                post.comments.select_related('author'), cursor,
+                max_depth=settings.BLOG_COMMENT_RENDER_DEPTH,
+            ),
+            'direction': (decode_thread_cursor(cursor) or (None,))[0],
+        }
     )
 
 
+def replies(request, post_id, comment_id):
+    """A fragment of the replies below a comment, paged like comments.
+
+    The subtree is one range of the (post, path) index; it is shown
+    BLOG_COMMENT_RENDER_DEPTH levels deep from the comment.
+    """
+    post = _get_post_for_comments(request, post_id)
+    parent = get_object_or_404(
+        post.comments.only('post', 'path'), pk=comment_id
+    )
+    cursor = request.GET.get('cursor', '')
+    return render(
+        request,
+        'includes/comment_list.html',
+        {
+            'post': post,
+            'comments': get_comments_page(
+                post.comments.select_related('author').subtree(
+                    parent.path
+                ).filter(path__gt=parent.path),
+                cursor,
+                max_depth=parent.depth + settings.BLOG_COMMENT_RENDER_DEPTH,
+            ),
+            'direction': (decode_thread_cursor(cursor) or (None,))[0],
+            'more_url': reverse('blog:replies', args=[post.id, parent.id]),
+        }
+    )
+
+
+def new_comments(request, post_id):
+    """Comments on the post newer than ?after=<comment id>, for polling.
+
+    A range scan of the comment post_id index from the given id; replies
+    with an HTML fragment, or JSON with ?format=json, and 204 in HTML
+    mode when there is nothing new.
+    """
+    form = NewCommentsForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+    post = _get_post_for_comments(request, post_id)
+    after = form.cleaned_data['after'] or 0
+    new = list(
+        post.comments.select_related('author').filter(
+            pk__gt=after
+        ).order_by('pk')[:settings.BLOG_COMMENTS_PER_PAGE]
+    )
+    last_id = new[-1].pk if new else after
+    if form.cleaned_data['format'] == 'json':
+        return JsonResponse({
+            'comments': [comment_event(comment) for comment in new],
+            'last_id': last_id,
+        })
+    if not new:
+        return HttpResponse(status=204)
+    response = render(
+        request,
+        'includes/comment_list.html',
+        {'post': post, 'comments': new},
+    )
+    response['X-Last-Comment-Id'] = last_id
+    return response
+
+
+@read_from_replicas
+@anonymous_page_cache
+@condition(etag_func=category_etag)
 def category_posts(request, category_slug):
     category = get_object_or_404(
         Category.objects.filter(is_published=True),
         slug=category_slug
     )
-    post_list = get_published_posts_with_no_filter(Post.objects).filter(
-        category=category
-    ).order_by('-pub_date')
-    page_obj = get_paginator(request, post_list)
+    post_list = get_published_posts_with_no_filter(
+        Post.objects.with_related()
+    ).filter(category=category).order_by('-pub_date')
+    page_obj = get_feed_page(request, post_list)
     return render(
         request,
         'blog/category.html',
@@ -49,22 +188,38 @@ def category_posts(request, category_slug):
     )
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    post_list = search_posts(
+        get_published_posts_with_no_filter(Post.objects.with_related()),
+        query
+    )
+    page_obj = get_paginator(request, post_list)
+    return render(
+        request,
+        'blog/search.html',
+        {'query': query, 'page_obj': page_obj}
+    )
+
+
 class RegistrationView(CreateView):
     form_class = UserCreationForm
     template_name = 'registration/registration_form.html'
     success_url = reverse_lazy('blog:index')
 
 
+@read_from_replicas
+@condition(etag_func=profile_etag)
 def profile(request, username):
     profile = get_object_or_404(get_user_model(), username=username)
 
     if profile == request.user:
-        post_list = profile.posts.all()
+        post_list = profile.posts.with_related()
     else:
-        post_list = get_published_posts(profile.posts.all())
+        post_list = get_published_posts(profile.posts.with_related())
 
-    post_list = comment_count(post_list).order_by("-pub_date")
-    page_obj = get_paginator(request, post_list)
+    post_list = post_list.order_by("-pub_date")
+    page_obj = get_feed_page(request, post_list)
     return render(
         request, "blog/profile.html",
         {"profile": profile, "page_obj": page_obj}
@@ -82,6 +237,8 @@ def edit_profile(request):
         form = UserEditForm(instance=request.user)
     return render(request, 'blog/user.html', {'form': form})
 
+
+@throttle_writes('post')
 @login_required
 def create_post(request):
     if request.method == 'POST':
@@ -95,6 +252,8 @@ def create_post(request):
         form = PostForm()
     return render(request, 'blog/create.html', {'form': form})
 
+
+@throttle_writes('post')
 @login_required
 def edit_post(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -109,6 +268,8 @@ def edit_post(request, post_id):
         form = PostForm(instance=post)
     return render(request, 'blog/create.html', {'form': form})
 
+
+@throttle_writes('comment')
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -118,9 +279,21 @@ def add_comment(request, post_id):
             comment = form.save(commit=False)
             comment.post = post
             comment.author = request.user
-            comment.save()
+            reply_to = request.POST.get('reply_to', '')
+            if reply_to.isdigit():
+                # An unknown comment to reply to makes a top-level one.
+                parent = post.comments.only('post', 'path').filter(
+                    pk=reply_to
+                ).first()
+                if parent is not None:
+                    comment.reply_to(parent)
+            with transaction.atomic():
+                comment.save()
+                transaction.on_commit(lambda: publish_comment(comment))
     return redirect('blog:post_detail', post_id=post_id)
 
+
+@throttle_writes('comment')
 @login_required
 def edit_comment(request, post_id, comment_id):
     comment = get_object_or_404(Comment, pk=comment_id)
@@ -139,6 +312,8 @@ def edit_comment(request, post_id, comment_id):
         {'form': form, 'comment': comment}
     )
 
+
+@throttle_writes('post')
 @login_required
 def delete_post(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -153,16 +328,55 @@ def delete_post(request, post_id):
         {'form': None, 'post': post}
     )
 
+
+@throttle_writes('comment')
 @login_required
 def delete_comment(request, post_id, comment_id):
     comment = get_object_or_404(Comment, pk=comment_id)
     if comment.author != request.user:
         return redirect('blog:post_detail', post_id=post_id)
     if request.method == 'POST':
-        comment.delete()
+        # Replies by others stay, moved up into the comment's place.
+        moderation.delete_comments(Comment.objects.filter(pk=comment.pk))
         return redirect('blog:post_detail', post_id=post_id)
     return render(
         request,
         'blog/comment.html',
         {'comment': comment, 'form': None}
     )
+
+
+@staff_member_required
+def export(request, kind):
+    form = ExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+    export_format = form.cleaned_data['format'] or 'ndjson'
+    queryset = export_queryset(
+        kind,
+        since=form.cleaned_data['since'],
+        until=form.cleaned_data['until'],
+        category=form.cleaned_data['category'],
+    )
+    response = StreamingHttpResponse(
+        iter_export(kind, export_format, queryset),
+        content_type=(
+            'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        ),
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{export_format}"'
+    )
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    path, fullpath, stat = media_file(path)
+    etag = media_etag(path, stat)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        response = file_response(request, path, fullpath, stat, etag)
+    return set_media_headers(response, path, stat, etag)
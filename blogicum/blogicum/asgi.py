@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up. Comment event streams are served by a
+# plain ASGI app, so idle readers hold no thread.
+from blog.sse import EventStreamRouter  # noqa: E402
+
+application = EventStreamRouter(django_application)
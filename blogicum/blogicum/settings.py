@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,6 +45,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.replicas.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -83,6 +85,68 @@ DATABASES = {
     }
 }
 
+# Aliases in DATABASES that replicate 'default'. The feeds and post pages
+# read from one of them; writes, and reads by a client for
+# BLOG_REPLICA_STICKY_SECONDS after it wrote, go to the primary.
+DATABASE_ROUTERS = ['blog.replicas.ReplicaRouter']
+BLOG_REPLICA_DATABASES = []
+BLOG_REPLICA_STICKY_SECONDS = 10
+
+# Applied to every new SQLite connection (blog.sqlite). WAL lets readers
+# run alongside a writer; writers wait busy_timeout ms for the lock. With
+# WAL, synchronous=NORMAL can lose the last commits on power loss but not
+# corrupt the file. A negative cache_size is in KiB. Compare with the
+# defaults using manage.py benchmark_sqlite.
+BLOG_SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+
+
+# Caches
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rendered post cards; keys carry a content version stamp, so stale
+    # entries are never read and simply age out of the LRU.
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Whole anonymous pages and their generation counter, on disk so a
+    # change made through one worker process invalidates them in all.
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'blogicum-pages'),
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    },
+    # Write throttling counters, on disk so every worker process sees them.
+    # Culling would reset live counters, so it starts late and removes a
+    # tenth; each key lives two windows. Increments are read-then-write,
+    # so concurrent processes can lose a count: limits are approximate.
+    # Use Memcached or Redis for atomic counters under heavy load.
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'blogicum-throttle'),
+        'OPTIONS': {'MAX_ENTRIES': 100_000, 'CULL_FREQUENCY': 10},
+    },
+}
+
+# POSTs to the write views allowed per client: (requests, window seconds).
+BLOG_THROTTLE_CACHE = 'throttle'
+BLOG_THROTTLE_RATES = {
+    'post': (20, 600),
+    'comment': (20, 60),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -134,6 +198,41 @@ CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Widths of the derived post images, generated after upload by a pool of
+# BLOG_IMAGE_WORKERS threads (0 renders them inline, e.g. in scripts).
+# Every width is written in the original format and in WebP; the named
+# ones are the plain <img src> fallbacks for cards and the detail page.
+BLOG_IMAGE_WIDTHS = (320, 480, 640, 960, 1280)
+BLOG_THUMBNAIL_WIDTHS = {'card': 640, 'detail': 1280}
+BLOG_IMAGE_WORKERS = 2
+# Longest side, in pixels, of the blurred inline placeholder of a card.
+BLOG_PLACEHOLDER_SIZE = 16
+
+# Post images are stored once per content hash. An image no post refers to
+# any more is deleted unless it was touched this many seconds ago.
+BLOG_MEDIA_DELETE_GRACE = 3600
+
+# Media is served by blog.views.serve_media. Content-addressed files are
+# cached forever; others for BLOG_MEDIA_MAX_AGE seconds. Set
+# BLOG_MEDIA_SENDFILE to 'x-accel-redirect' (nginx, internal location at
+# BLOG_MEDIA_ACCEL_PREFIX) or 'x-sendfile' to let the proxy send the bytes.
+BLOG_MEDIA_MAX_AGE = 3600
+BLOG_MEDIA_SENDFILE = None
+BLOG_MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Uploads past FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to disk, and no more
+# than BLOG_MAX_UPLOAD_SIZE bytes of a file are kept. Post images are
+# checked from their header: only BLOG_IMAGE_FORMATS up to
+# BLOG_MAX_IMAGE_PIXELS pixels are accepted, before anything is decoded.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'blog.uploads.BoundedTemporaryFileUploadHandler',
+]
+BLOG_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+BLOG_MAX_IMAGE_PIXELS = 40_000_000
+BLOG_IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
@@ -142,3 +241,32 @@ LOGOUT_REDIRECT_URL = 'blog:index'
 LOGIN_URL = 'login'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
+
+# Cursor pagination of the feeds keyed on (pub_date, id): no COUNT(*)
+# and no OFFSET scan, so every page costs the same.
+BLOG_KEYSET_PAGINATION = False
+
+# Comments rendered with a post; the rest load in pages of the same size
+# from blog:comments, in thread order keyed on the comment path.
+BLOG_COMMENTS_PER_PAGE = 50
+
+# Replies nest at most BLOG_COMMENT_MAX_DEPTH levels (deeper replies join
+# their parent's level); pages show BLOG_COMMENT_RENDER_DEPTH levels and
+# load the replies below on demand.
+BLOG_COMMENT_MAX_DEPTH = 10
+BLOG_COMMENT_RENDER_DEPTH = 3
+
+# Broker behind the /posts/<id>/events/ comment streams (ASGI only).
+# LocalBroker serves a single process; with several workers use
+# 'blog.events.FileBroker' and {'path': '/some/shared/events.log'}.
+# FileBroker rotates the file to events.log.1 past 'max_size' bytes
+# (1 MiB by default), so about twice that stays on disk.
+BLOG_EVENTS_BACKEND = 'blog.events.LocalBroker'
+BLOG_EVENTS_OPTIONS = {}
+BLOG_EVENTS_KEEPALIVE = 15
+
+# Seconds anonymous index/category pages stay in the full-response cache;
+# 0 disables it. Entries also expire when the next scheduled post goes live.
+# Pages live in the BLOG_PAGE_CACHE alias, which every process must share.
+BLOG_PAGE_CACHE = 'pages'
+BLOG_PAGE_CACHE_TIMEOUT = 0
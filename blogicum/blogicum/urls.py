@@ -1,9 +1,10 @@
-from django.urls import path, include
+import re
+
+from django.urls import path, include, re_path
 from django.contrib import admin
 from django.conf.urls import handler403, handler404, handler500
 from blog import views
 from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,7 +13,11 @@ urlpatterns = [
     path('auth/', include('django.contrib.auth.urls')),
     path('auth/registration/',
          views.RegistrationView.as_view(), name='registration'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    re_path(
+        r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+        views.serve_media, name='media',
+    ),
+]
 
 handler403 = 'pages.views.csrf_failure'
 handler404 = 'pages.views.page_not_found'
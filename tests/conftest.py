@@ -41,6 +41,47 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(
+        django_db_modify_db_settings_parallel_suffix, tmp_path_factory
+):
+    # Primary and replica as two SQLite files; nothing replicates between
+    # them, so tests can tell which one a query went to.
+    from django.db import connections
+
+    directory = tmp_path_factory.mktemp("databases")
+    databases = connections.databases
+    databases["default"]["TEST"]["NAME"] = str(directory / "primary.sqlite3")
+    databases["replica"] = {
+        **databases["default"],
+        "TEST": {
+            **databases["default"]["TEST"],
+            "NAME": str(directory / "replica.sqlite3"),
+        },
+    }
+
+
+@pytest.fixture(autouse=True)
+def private_caches(settings):
+    # Private, empty shared caches: never the directories a live server
+    # uses.
+    from django.core.cache import caches
+
+    aliases = (settings.BLOG_THROTTLE_CACHE, settings.BLOG_PAGE_CACHE)
+    settings.CACHES = {
+        **settings.CACHES,
+        **{
+            alias: {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": f"{alias}-tests",
+            }
+            for alias in aliases
+        },
+    }
+    for alias in aliases:
+        caches[alias].clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -363,6 +404,7 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
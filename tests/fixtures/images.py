@@ -0,0 +1,29 @@
+"""In-memory images for the upload, storage and media tests."""
+import os
+from io import BytesIO
+
+from PIL import Image
+from django.core.files.images import ImageFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG", ".webp": "WEBP"}
+
+
+def image_bytes(size=(50, 50), color=(10, 120, 200), image_format="PNG"):
+    """Encode a one-colour image of `size`."""
+    buffer = BytesIO()
+    Image.new("RGB", size, color=color).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def image_file(size=(50, 50), color=(10, 120, 200), name="image.png",
+               uploaded=False):
+    """Build an image named `name`, encoded as its extension says.
+
+    An ImageFile to assign to a model field, or with `uploaded` a
+    SimpleUploadedFile to submit through a form.
+    """
+    data = image_bytes(size, color, FORMATS[os.path.splitext(name)[1]])
+    if uploaded:
+        return SimpleUploadedFile(name, data)
+    return ImageFile(BytesIO(data), name=name)
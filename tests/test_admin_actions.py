@@ -0,0 +1,121 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+POSTS_URL = "/admin/blog/post/"
+COMMENTS_URL = "/admin/blog/comment/"
+
+
+@pytest.fixture
+def spammer(mixer):
+    return mixer.blend("auth.User")
+
+
+@pytest.fixture
+def board(mixer, user, spammer, published_category):
+    own = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category
+    )
+    spam = mixer.cycle(4).blend(
+        "blog.Post", author=spammer, category=published_category
+    )
+    mixer.cycle(2).blend("blog.Comment", post=own[0], author=spammer)
+    mixer.blend("blog.Comment", post=own[0], author=user)
+    mixer.cycle(3).blend("blog.Comment", post=spam[0], author=user)
+    return own, spam
+
+
+def _act(admin_client, url, action, objects, **extra):
+    data = {
+        "action": action,
+        "_selected_action": [obj.pk for obj in objects],
+        **extra,
+    }
+    with CaptureQueriesContext(connection) as ctx:
+        response = admin_client.post(url, data)
+    queries = ctx.captured_queries
+    assert response.status_code == 302
+    followed = admin_client.get(response.url)
+    messages = [str(m) for m in followed.context["messages"]]
+    return messages, queries
+
+
+def _row_reads(queries, table):
+    return [
+        q["sql"] for q in queries
+        if q["sql"].startswith("SELECT")
+        and f'FROM "{table}"' in q["sql"]
+        and "COUNT(" not in q["sql"]
+    ]
+
+
+def test_unpublish_is_one_update(admin_client, board):
+    own, spam = board
+    messages, queries = _act(admin_client, POSTS_URL, "unpublish", spam)
+    assert "Снято с публикации: 4." in messages
+    updates = [q for q in queries if q["sql"].startswith("UPDATE")]
+    assert len(updates) == 1, "Снятие с публикации должно быть одним UPDATE."
+    assert Post.objects.filter(is_published=False).count() == 4
+
+    messages, _ = _act(admin_client, POSTS_URL, "republish", spam[:2])
+    assert "Опубликовано: 2." in messages
+
+
+def test_move_to_category(admin_client, board, another_category):
+    own, _ = board
+    messages, _ = _act(
+        admin_client, POSTS_URL, "move_to_category", own,
+        category=another_category.pk,
+    )
+    assert f"Перенесено в «{another_category}»: 3." in messages
+    assert Post.objects.filter(category=another_category).count() == 3
+
+    messages, _ = _act(admin_client, POSTS_URL, "move_to_category", own)
+    assert "Выберите категорию." in messages
+
+
+def test_delete_posts_without_loading_rows(admin_client, board):
+    _, spam = board
+    messages, queries = _act(admin_client, POSTS_URL, "delete_posts", spam)
+    assert "Удалено публикаций: 4, комментариев: 3." in messages
+    assert not _row_reads(queries, "blog_post"), (
+        "Удаление не должно загружать публикации в память."
+    )
+    assert not Post.objects.filter(pk__in=[p.pk for p in spam]).exists()
+
+
+def test_delete_author_content(admin_client, board, spammer):
+    own, spam = board
+    messages, queries = _act(
+        admin_client, POSTS_URL, "delete_author_content", spam[:1]
+    )
+    assert "Авторов: 1; удалено публикаций: 4, комментариев: 5." in messages, (
+        "Должны удаляться все публикации и комментарии автора."
+    )
+    assert not Post.objects.filter(author=spammer).exists()
+    assert not Comment.objects.filter(author=spammer).exists()
+    own[0].refresh_from_db()
+    assert own[0].comment_count == 1, (
+        "Счётчик комментариев должен уменьшаться при массовом удалении."
+    )
+
+
+def test_delete_comments_keeps_counters(admin_client, board, spammer):
+    own, _ = board
+    spam_comments = list(Comment.objects.filter(author=spammer))
+    messages, _ = _act(
+        admin_client, COMMENTS_URL, "delete_comments", spam_comments
+    )
+    assert "Удалено комментариев: 2." in messages
+    own[0].refresh_from_db()
+    assert own[0].comment_count == 1
+
+
+def test_default_delete_action_removed(admin_client, board):
+    for url in (POSTS_URL, COMMENTS_URL):
+        content = admin_client.get(url).content.decode()
+        assert 'value="delete_selected"' not in content
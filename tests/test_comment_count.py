@@ -0,0 +1,40 @@
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(
+        mixer, post_with_published_location, another_user
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    post.refresh_from_db()
+    assert post.comment_count == 4, (
+        "Убедитесь, что счётчик комментариев увеличивается при их создании."
+    )
+
+    comments[0].delete()
+    another_user.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что счётчик комментариев уменьшается при удалении,"
+        " в том числе каскадном."
+    )
+
+
+def test_reconcile_comment_counts(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    type(post).objects.filter(pk=post.pk).update(comment_count=40)
+
+    call_command("reconcile_comment_counts", "--dry-run")
+    post.refresh_from_db()
+    assert post.comment_count == 40
+
+    call_command("reconcile_comment_counts", "--batch-size", "1")
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Команда reconcile_comment_counts должна исправлять счётчик."
+    )
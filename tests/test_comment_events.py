@@ -0,0 +1,174 @@
+import asyncio
+import os
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+
+from blog.events import (
+    FileBroker, LocalBroker, comment_channel, get_broker,
+)
+from blogicum.asgi import application
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+def _scope(post_id, headers=()):
+    return {
+        "type": "http", "method": "GET", "path": f"/posts/{post_id}/events/",
+        "query_string": b"", "headers": list(headers),
+    }
+
+
+async def _connect(scope):
+    communicator = ApplicationCommunicator(application, scope)
+    await communicator.send_input({"type": "http.request"})
+    start = await communicator.receive_output(timeout=3)
+    return communicator, start
+
+
+async def _disconnect(communicator):
+    await communicator.send_input({"type": "http.disconnect"})
+    await communicator.wait(timeout=3)
+
+
+def test_stream_pushes_new_comments(user_client, post_with_published_location):
+    post = post_with_published_location
+
+    async def scenario():
+        communicator, start = await _connect(_scope(post.id))
+        assert start["status"] == 200
+        assert (b"content-type", b"text/event-stream") in start["headers"]
+        await communicator.receive_output(timeout=3)  # retry: preamble
+
+        await sync_to_async(user_client.post)(
+            f"/posts/{post.id}/comment/", {"text": "live comment"}
+        )
+        event = await communicator.receive_output(timeout=3)
+        await _disconnect(communicator)
+        return event["body"].decode()
+
+    body = async_to_sync(scenario)()
+    assert "event: comment" in body and "live comment" in body, (
+        "Новый комментарий должен приходить подписчикам потока событий."
+    )
+
+
+def test_stream_replays_after_last_event_id(mixer, user, post_with_published_location):
+    post = post_with_published_location
+    first, second = mixer.cycle(2).blend(
+        "blog.Comment", post=post, author=user,
+        text=mixer.sequence("missed {0}"),
+    )
+
+    async def scenario():
+        communicator, _ = await _connect(_scope(
+            post.id, [(b"last-event-id", str(first.id).encode())]
+        ))
+        body = (await communicator.receive_output(timeout=3))["body"]
+        await _disconnect(communicator)
+        return body.decode()
+
+    body = async_to_sync(scenario)()
+    assert f"id: {second.id}" in body and f"id: {first.id}\n" not in body
+
+
+def test_stream_keeps_comments_published_out_of_order(
+        post_with_published_location
+):
+    post = post_with_published_location
+
+    async def scenario():
+        communicator, _ = await _connect(_scope(post.id))
+        await communicator.receive_output(timeout=3)  # retry: preamble
+        broker = get_broker()
+        for comment_id in (2, 1):
+            broker.publish(comment_channel(post.id), {"id": comment_id})
+        events = [
+            (await communicator.receive_output(timeout=3))["body"]
+            for _ in range(2)
+        ]
+        await _disconnect(communicator)
+        return b"".join(events).decode()
+
+    body = async_to_sync(scenario)()
+    assert "id: 2\n" in body and "id: 1\n" in body, (
+        "Комментарий, опубликованный позже комментария с большим id,"
+        " не должен теряться."
+    )
+
+
+def test_stream_of_hidden_post(mixer, user):
+    post = mixer.blend("blog.Post", author=user, is_published=False)
+
+    async def scenario():
+        communicator, start = await _connect(_scope(post.id))
+        await communicator.receive_output(timeout=3)
+        return start["status"]
+
+    assert async_to_sync(scenario)() == 404
+
+
+def test_other_paths_reach_django(client):
+    async def scenario():
+        communicator = ApplicationCommunicator(application, {
+            **_scope(0, [(b"host", b"testserver")]),
+            "path": "/pages/about/",
+        })
+        await communicator.send_input({"type": "http.request"})
+        return (await communicator.receive_output(timeout=3))["status"]
+
+    assert async_to_sync(scenario)() == 200
+
+
+@pytest.mark.parametrize("backend", ["local", "file"])
+def test_broker_fan_out(tmp_path, backend):
+    if backend == "file":
+        path = tmp_path / "events.log"
+        # Two brokers on one file stand for two worker processes.
+        subscriber_side = FileBroker(path, poll_interval=0.01)
+        publisher_side = FileBroker(path, poll_interval=0.01)
+    else:
+        subscriber_side = publisher_side = LocalBroker()
+
+    async def scenario():
+        subscriptions = [
+            subscriber_side.subscribe("channel") for _ in range(1000)
+        ]
+        other = subscriber_side.subscribe("other")
+        await asyncio.sleep(0)
+        publisher_side.publish("channel", {"id": 1})
+        messages = await asyncio.wait_for(
+            asyncio.gather(*(s.get() for s in subscriptions)), timeout=3
+        )
+        assert other.queue.empty()
+        for subscription in subscriptions + [other]:
+            subscription.close()
+        return messages
+
+    assert async_to_sync(scenario)() == [{"id": 1}] * 1000
+    assert not subscriber_side._subscribers
+
+
+def test_file_broker_rotates(tmp_path):
+    path = tmp_path / "events.log"
+    subscriber_side = FileBroker(path, poll_interval=0.01)
+    publisher_side = FileBroker(path, poll_interval=0.01, max_size=100)
+
+    async def scenario():
+        subscription = subscriber_side.subscribe("channel")
+        await asyncio.sleep(0)
+        messages = []
+        for i in range(10):
+            publisher_side.publish("channel", {"id": i, "text": "x" * 40})
+            messages.append(
+                await asyncio.wait_for(subscription.get(), timeout=3)
+            )
+        subscription.close()
+        return messages
+
+    assert [m["id"] for m in async_to_sync(scenario)()] == list(range(10))
+    assert os.path.getsize(path) < 200, (
+        "Файл событий должен ротироваться по достижении max_size."
+    )
+    assert os.path.exists(f"{path}.1")
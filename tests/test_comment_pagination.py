@@ -0,0 +1,81 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def long_thread(mixer, post_with_published_location, user):
+    comments = mixer.cycle(7).blend(
+        "blog.Comment", post=post_with_published_location, author=user,
+        text=mixer.sequence("comment text {0}"),
+    )
+    return post_with_published_location, comments
+
+
+def _texts(content):
+    return re.findall(r"comment text \d+", content)
+
+
+def _cursor(content, position):
+    match = re.search(
+        r'\?cursor=([\w-]+)" data-position="%s"' % position, content
+    )
+    return match and match.group(1)
+
+
+@override_settings(BLOG_COMMENTS_PER_PAGE=3)
+def test_detail_renders_first_comments(client, long_thread):
+    post, comments = long_thread
+    with CaptureQueriesContext(connection) as ctx:
+        content = client.get(f"/posts/{post.id}/").content.decode()
+    assert _texts(content) == [c.text for c in comments[:3]], (
+        "На странице поста должны выводиться только первые комментарии."
+    )
+    assert len(ctx.captured_queries) <= 3
+    assert _cursor(content, "after")
+
+
+@override_settings(BLOG_COMMENTS_PER_PAGE=3)
+def test_fragments_walk_the_thread(client, long_thread):
+    post, comments = long_thread
+    content = client.get(f"/posts/{post.id}/").content.decode()
+    seen = _texts(content)
+    cursor = _cursor(content, "after")
+    while cursor:
+        with CaptureQueriesContext(connection) as ctx:
+            fragment = client.get(
+                f"/posts/{post.id}/comments/?cursor={cursor}"
+            ).content.decode()
+        assert len(ctx.captured_queries) == 2
+        assert _cursor(fragment, "before") is None
+        seen += _texts(fragment)
+        cursor = _cursor(fragment, "after")
+    assert seen == [c.text for c in comments], (
+        "Фрагменты должны по порядку отдавать все комментарии без повторов."
+    )
+
+
+@override_settings(BLOG_COMMENTS_PER_PAGE=3)
+def test_fragment_before_cursor(client, long_thread):
+    post, comments = long_thread
+    content = client.get(f"/posts/{post.id}/").content.decode()
+    fragment = client.get(
+        f"/posts/{post.id}/comments/?cursor={_cursor(content, 'after')}"
+    ).content.decode()
+    previous = client.get(
+        f"/posts/{post.id}/comments/?cursor={_cursor(fragment, 'before')}"
+    ).content.decode()
+    assert _texts(previous) == [c.text for c in comments[:3]]
+
+
+def test_fragment_of_hidden_post(client, mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False,
+    )
+    assert client.get(f"/posts/{post.id}/comments/").status_code == 404
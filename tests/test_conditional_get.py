@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def urls(post_with_published_location, user):
+    post = post_with_published_location
+    return {
+        "index": "/",
+        "category_posts": f"/category/{post.category.slug}/",
+        "profile": f"/profile/{user.username}/",
+        "post_detail": f"/posts/{post.id}/",
+    }
+
+
+@pytest.mark.parametrize(
+    "view_name", ["index", "category_posts", "profile", "post_detail"]
+)
+def test_unchanged_page_not_modified(client, urls, view_name):
+    etag = client.get(urls[view_name])["ETag"]
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(urls[view_name], HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        "Неизменившаяся страница должна отдавать `304 Not Modified`."
+    )
+    assert len(ctx.captured_queries) == 1
+
+
+@pytest.mark.parametrize(
+    "view_name", ["index", "category_posts", "profile", "post_detail"]
+)
+def test_changed_page_revalidates(
+        client, urls, view_name, post_with_published_location
+):
+    etag = client.get(urls[view_name])["ETag"]
+    post_with_published_location.title = "Новый заголовок"
+    post_with_published_location.save()
+    response = client.get(urls[view_name], HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_post_detail_last_modified_follows_comments(
+        mixer, client, urls, post_with_published_location
+):
+    last_modified = client.get(urls["post_detail"])["Last-Modified"]
+    response = client.get(
+        urls["post_detail"], HTTP_IF_MODIFIED_SINCE=last_modified
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    etag = response["ETag"]
+    response = client.get(urls["post_detail"], HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Новый комментарий должен менять валидатор страницы поста."
+    )
+
+
+def test_etag_differs_per_viewer(client, user_client, urls):
+    assert client.get(urls["index"])["ETag"] != (
+        user_client.get(urls["index"])["ETag"]
+    )
+
+
+@pytest.mark.parametrize("view_name", ["index", "category_posts"])
+def test_author_rename_revalidates_feeds(
+        client, urls, view_name, post_with_published_location
+):
+    etag = client.get(urls[view_name])["ETag"]
+    author = post_with_published_location.author
+    author.username = "renamed-author"
+    author.save()
+    response = client.get(urls[view_name], HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Смена имени автора должна менять валидатор ленты."
+    )
+    assert "renamed-author" in response.content.decode()
+
+
+def test_commenter_rename_revalidates_post(
+        client, urls, comment_to_a_post
+):
+    url = f"/posts/{comment_to_a_post.post_id}/"
+    etag = client.get(url)["ETag"]
+    commenter = comment_to_a_post.author
+    commenter.username = "renamed-commenter"
+    commenter.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+
+@pytest.mark.parametrize(
+    "view_name", ["index", "category_posts", "post_detail"]
+)
+def test_viewer_rename_revalidates_page(another_user, urls, view_name):
+    viewer = Client()
+    viewer.force_login(another_user)
+    etag = viewer.get(urls[view_name])["ETag"]
+    another_user.username = "renamed-viewer"
+    another_user.save()
+    response = viewer.get(urls[view_name], HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Смена имени пользователя должна менять валидатор его страниц,"
+        " даже если у него нет постов."
+    )
+    assert "renamed-viewer" in response.content.decode()
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def staff_client(mixer):
+    client = Client()
+    client.force_login(mixer.blend("auth.User", is_staff=True))
+    return client
+
+
+def _body(response):
+    return b"".join(response.streaming_content).decode()
+
+
+def test_export_is_staff_only(user_client):
+    response = user_client.get("/export/posts/")
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_export_posts_ndjson(
+        staff_client, many_posts_with_published_locations, another_category,
+        post_with_another_category
+):
+    response = staff_client.get(
+        "/export/posts/", {"category": another_category.slug}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.streaming
+    rows = [json.loads(line) for line in _body(response).splitlines()]
+    assert [row["id"] for row in rows] == [post_with_another_category.id]
+    assert rows[0]["category"] == another_category.slug
+
+    rows = _body(staff_client.get("/export/posts/")).splitlines()
+    assert len(rows) == len(many_posts_with_published_locations) + 1
+
+
+def test_export_comments_csv(staff_client, comment_to_a_post):
+    response = staff_client.get("/export/comments/", {"format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(_body(response))))
+    assert [int(row["id"]) for row in rows] == [comment_to_a_post.id]
+
+
+def test_export_rejects_bad_filters(staff_client):
+    response = staff_client.get("/export/posts/", {"since": "yesterday"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_export_command(tmp_path, many_posts_with_published_locations):
+    output = tmp_path / "posts.csv"
+    call_command("export_blog", "posts", "--format", "csv", "-o", output)
+    with open(output, encoding="utf-8") as fh:
+        rows = list(csv.DictReader(fh))
+    assert len(rows) == len(many_posts_with_published_locations)
@@ -0,0 +1,68 @@
+import pytest
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+
+from blog.models import Post
+from fixtures.images import image_file
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def image_post(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        image=image_file((300, 200), name="meta.png"),
+    )
+    post.refresh_from_db()
+    return post
+
+
+@pytest.fixture
+def no_file_access(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError(
+            "При отрисовке страниц файлы изображений не должны открываться."
+        )
+
+    for method in ("open", "exists", "size", "path", "get_modified_time"):
+        monkeypatch.setattr(FileSystemStorage, method, fail)
+
+
+def test_metadata_recorded_on_save(image_post):
+    manifest = image_post.image_variants
+    assert manifest["source"] == image_post.image.name
+    assert (manifest["width"], manifest["height"]) == (300, 200)
+    assert manifest["format"] == "png"
+    assert manifest["size"] == image_post.image.size
+
+
+def test_pages_render_without_file_access(
+        client, admin_client, image_post, no_file_access
+):
+    content = client.get("/").content.decode()
+    assert 'width="300" height="200"' in content, (
+        "Карточка поста должна указывать размеры изображения."
+    )
+    detail = client.get(f"/posts/{image_post.id}/").content.decode()
+    assert 'width="300" height="200"' in detail
+
+    changelist = admin_client.get("/admin/blog/post/")
+    assert changelist.status_code == 200
+    assert "300×200" in changelist.content.decode()
+    change = admin_client.get(f"/admin/blog/post/{image_post.id}/change/")
+    assert change.status_code == 200
+
+
+def test_backfill_command(image_post):
+    Post.objects.filter(pk=image_post.pk).update(
+        image_variants={"source": image_post.image.name, "width": 300,
+                        "format": "png", "variants": {"png": []}}
+    )
+    call_command("backfill_image_metadata")
+    image_post.refresh_from_db()
+    manifest = image_post.image_variants
+    assert manifest["height"] == 200 and manifest["size"] > 0
+    assert manifest["variants"] == {"png": []}, (
+        "Уже созданные варианты изображения должны сохраниться."
+    )
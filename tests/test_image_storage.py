@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from django.test import override_settings
+
+from blog.storage import post_image_storage
+from fixtures.images import image_file
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def twin_posts(mixer, user, published_category):
+    return mixer.cycle(2).blend(
+        "blog.Post", author=user, category=published_category,
+        image=mixer.sequence(
+            image_file(color=(1, 2, 3), name="first.png"),
+            image_file(color=(1, 2, 3), name="second.png"),
+        ),
+    )
+
+
+def test_identical_uploads_share_one_file(twin_posts):
+    first, second = twin_posts
+    assert first.image.name == second.image.name, (
+        "Одинаковые изображения должны храниться в одном файле."
+    )
+    assert first.image.url == second.image.url
+    assert post_image_storage.exists(first.image.name)
+
+
+@override_settings(BLOG_MEDIA_DELETE_GRACE=0)
+def test_file_released_with_last_reference(
+        twin_posts, django_capture_on_commit_callbacks
+):
+    first, second = twin_posts
+    name = first.image.name
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert post_image_storage.exists(name)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second.image = image_file(color=(9, 9, 9), name="other.png")
+        second.save()
+    assert not post_image_storage.exists(name), (
+        "Файл без ссылок на него должен удаляться."
+    )
+    assert post_image_storage.exists(second.image.name)
+
+
+def test_recent_file_kept_within_grace(
+        twin_posts, django_capture_on_commit_callbacks
+):
+    name = twin_posts[0].image.name
+    with django_capture_on_commit_callbacks(execute=True):
+        for post in twin_posts:
+            post.delete()
+    assert post_image_storage.exists(name)
+    os.remove(post_image_storage.path(name))
+
+
+def test_concurrent_identical_upload_reuses_file(twin_posts, monkeypatch):
+    name = twin_posts[0].image.name
+    # As if another upload wrote the same bytes after our exists() check.
+    monkeypatch.setattr(post_image_storage, "exists", lambda name: False)
+    saved = post_image_storage.save(
+        "posts_images/third.png", image_file(color=(1, 2, 3), name="third.png")
+    )
+    assert saved == name
+    directory = os.path.dirname(post_image_storage.path(name))
+    assert not [f for f in os.listdir(directory) if f.endswith(".part")]
@@ -0,0 +1,75 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.functions import CURSOR_NEXT, encode_cursor
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _walk(client, url, cursor_attr):
+    seen = []
+    cursor = ""
+    while True:
+        response = client.get(url, {"cursor": cursor} if cursor else {})
+        page_obj = response.context["page_obj"]
+        seen.append([post.id for post in page_obj])
+        cursor = getattr(page_obj, cursor_attr)
+        if not cursor:
+            return seen, page_obj
+
+
+@override_settings(BLOG_KEYSET_PAGINATION=True)
+def test_keyset_pages_cover_feed_once(
+        many_posts_with_published_locations, user_client
+):
+    pages, last_page = _walk(user_client, "/", "next_cursor")
+    ids = [post_id for page in pages for post_id in page]
+    assert len(ids) == len(set(ids)) == len(
+        many_posts_with_published_locations
+    ), "Курсорная пагинация должна выдать каждый пост ровно один раз."
+    assert all(len(page) <= N_PER_PAGE for page in pages)
+
+    response = user_client.get(
+        "/", {"cursor": last_page.previous_cursor}
+    )
+    assert [post.id for post in response.context["page_obj"]] == pages[-2], (
+        "Курсор назад должен вернуть предыдущую страницу в том же порядке."
+    )
+
+
+@override_settings(BLOG_KEYSET_PAGINATION=True)
+def test_keyset_page_issues_no_count(
+        many_posts_with_published_locations, user_client
+):
+    with CaptureQueriesContext(connection) as ctx:
+        user_client.get("/")
+    assert not any("COUNT(*)" in q["sql"] for q in ctx.captured_queries), (
+        "При курсорной пагинации ленты не должен выполняться COUNT(*)."
+    )
+
+
+@override_settings(BLOG_KEYSET_PAGINATION=True)
+def test_keyset_ignores_malformed_cursor(
+        many_posts_with_published_locations, user_client
+):
+    response = user_client.get("/", {"cursor": "not-a-cursor"})
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+
+@override_settings(BLOG_KEYSET_PAGINATION=True)
+def test_keyset_cursor_past_the_end_falls_back_to_first_page(
+        many_posts_with_published_locations, user_client
+):
+    oldest = min(
+        many_posts_with_published_locations, key=lambda p: (p.pub_date, p.id)
+    )
+    response = user_client.get(
+        "/", {"cursor": encode_cursor(oldest, CURSOR_NEXT)}
+    )
+    page_obj = response.context["page_obj"]
+    assert len(page_obj) == N_PER_PAGE
+    assert not page_obj.has_previous()
@@ -0,0 +1,87 @@
+import os
+from io import StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import override_settings
+
+from blog.images import build_variants
+from blog.storage import post_image_storage
+from fixtures.images import image_bytes, image_file
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+def _age(name, seconds=7200):
+    path = post_image_storage.path(name)
+    past = os.path.getmtime(path) - seconds
+    os.utime(path, (past, past))
+
+
+def _files(manifest):
+    return [manifest["source"]] + [
+        name for entries in manifest["variants"].values()
+        for _, name in entries
+    ]
+
+
+@pytest.fixture
+def kept_post(mixer, user, published_category,
+              django_capture_on_commit_callbacks):
+    with override_settings(BLOG_IMAGE_WORKERS=0):
+        with django_capture_on_commit_callbacks(execute=True):
+            post = mixer.blend(
+                "blog.Post", author=user, category=published_category,
+                image=image_file((700, 300), (4, 5, 6), name="kept.png"),
+            )
+    post.refresh_from_db()
+    for name in _files(post.image_variants):
+        _age(name)
+    return post
+
+
+@pytest.fixture
+def orphan_files():
+    name = post_image_storage.save(
+        "posts_images/orphan.png",
+        ContentFile(image_bytes((700, 300), (200, 1, 1))),
+    )
+    files = _files(build_variants(name))
+    for file in files:
+        _age(file)
+    return files
+
+
+def _collect(*args):
+    out = StringIO()
+    call_command("collect_orphaned_media", *args, stdout=out)
+    return out.getvalue()
+
+
+def test_dry_run_deletes_nothing(kept_post, orphan_files):
+    output = _collect("--dry-run", "--grace", "60")
+    assert "Would delete" in output
+    assert all(post_image_storage.exists(name) for name in orphan_files)
+
+
+def test_orphans_and_their_variants_deleted(kept_post, orphan_files):
+    _collect("--grace", "60", "--batch-size", "2")
+    assert not any(post_image_storage.exists(name) for name in orphan_files), (
+        "Файлы, на которые не ссылается ни один пост, должны удаляться"
+        " вместе с уменьшенными копиями."
+    )
+    assert all(
+        post_image_storage.exists(name)
+        for name in _files(kept_post.image_variants)
+    ), "Используемые изображения не должны удаляться."
+
+
+def test_recent_orphans_kept(kept_post, orphan_files):
+    _collect("--grace", "86400")
+    assert all(post_image_storage.exists(name) for name in orphan_files)
@@ -0,0 +1,141 @@
+import os
+
+import pytest
+from django.core.files.base import ContentFile
+from django.http import Http404
+from django.test import override_settings
+
+from blog.media import media_file
+from blog.storage import post_image_storage
+from fixtures.images import image_bytes
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def hashed_image():
+    data = image_bytes((30, 20), (7, 8, 9))
+    name = post_image_storage.save(
+        "posts_images/media.png", ContentFile(data)
+    )
+    return name, data
+
+
+@pytest.fixture
+def plain_image():
+    name = "posts_images/plain-media-test.png"
+    with open(post_image_storage.path(name), "wb") as file:
+        file.write(b"0123456789")
+    yield name
+    post_image_storage.delete(name)
+
+
+def _body(response):
+    return b"".join(response.streaming_content)
+
+
+def test_full_response_headers(client, hashed_image):
+    name, data = hashed_image
+    response = client.get(f"/media/{name}")
+    assert response.status_code == 200
+    assert _body(response) == data
+    assert response["Content-Type"] == "image/png"
+    assert response["Accept-Ranges"] == "bytes"
+    assert "immutable" in response["Cache-Control"], (
+        "Файлы с хешем в имени должны отдаваться с immutable Cache-Control."
+    )
+    assert response["ETag"] and response["Last-Modified"]
+
+
+def test_unhashed_file_short_lived(client, plain_image):
+    response = client.get(f"/media/{plain_image}")
+    assert response.status_code == 200
+    assert "immutable" not in response["Cache-Control"]
+
+
+def test_variant_not_immutable(client, hashed_image):
+    name, data = hashed_image
+    directory, filename = name.rsplit("/", 1)
+    variant = f"{directory}/thumbs/320/{filename}"
+    path = post_image_storage.path(variant)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(data)
+    try:
+        response = client.get(f"/media/{variant}")
+        assert "immutable" not in response["Cache-Control"], (
+            "Производные изображения перезаписываются и не могут быть"
+            " immutable."
+        )
+    finally:
+        post_image_storage.delete(variant)
+
+
+def test_if_none_match(client, hashed_image):
+    name, _ = hashed_image
+    etag = client.get(f"/media/{name}")["ETag"]
+    response = client.get(f"/media/{name}", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+
+def test_if_modified_since(client, hashed_image):
+    name, _ = hashed_image
+    last_modified = client.get(f"/media/{name}")["Last-Modified"]
+    response = client.get(
+        f"/media/{name}", HTTP_IF_MODIFIED_SINCE=last_modified
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize(
+    "header, span",
+    [("bytes=0-3", (0, 3)), ("bytes=4-", (4, 9)), ("bytes=-3", (7, 9))],
+)
+def test_range(client, plain_image, header, span):
+    response = client.get(f"/media/{plain_image}", HTTP_RANGE=header)
+    start, end = span
+    assert response.status_code == 206
+    assert _body(response) == b"0123456789"[start:end + 1]
+    assert response["Content-Range"] == f"bytes {start}-{end}/10"
+    assert response["Content-Length"] == str(end - start + 1)
+
+
+def test_unsatisfiable_range(client, plain_image):
+    response = client.get(f"/media/{plain_image}", HTTP_RANGE="bytes=20-")
+    assert response.status_code == 416
+    assert response["Content-Range"] == "bytes */10"
+
+
+def test_stale_if_range_sends_whole_file(client, plain_image):
+    response = client.get(
+        f"/media/{plain_image}", HTTP_RANGE="bytes=0-3",
+        HTTP_IF_RANGE='"stale"',
+    )
+    assert response.status_code == 200
+    assert _body(response) == b"0123456789"
+
+
+def test_missing_file_and_traversal(client):
+    assert client.get("/media/posts_images/missing.png").status_code == 404
+    with pytest.raises(Http404):
+        media_file("posts_images/../../manage.py")
+
+
+@override_settings(
+    BLOG_MEDIA_SENDFILE="x-accel-redirect",
+    BLOG_MEDIA_ACCEL_PREFIX="/protected-media/",
+)
+def test_x_accel_redirect(client, hashed_image):
+    name, _ = hashed_image
+    response = client.get(f"/media/{name}")
+    assert response.status_code == 200
+    assert response["X-Accel-Redirect"] == f"/protected-media/{name}"
+    assert response.content == b""
+    assert "immutable" in response["Cache-Control"]
+
+
+@override_settings(BLOG_MEDIA_SENDFILE="x-sendfile")
+def test_x_sendfile(client, hashed_image):
+    name, _ = hashed_image
+    response = client.get(f"/media/{name}")
+    assert response["X-Sendfile"] == post_image_storage.path(name)
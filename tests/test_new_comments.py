@@ -0,0 +1,56 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def thread(mixer, post_with_published_location, user):
+    comments = mixer.cycle(3).blend(
+        "blog.Comment", post=post_with_published_location, author=user,
+        text=mixer.sequence("delta comment {0}"),
+    )
+    mixer.blend("blog.Comment", author=user, text="other post comment")
+    return post_with_published_location, comments
+
+
+def test_json_delta(client, thread):
+    post, comments = thread
+    url = f"/posts/{post.id}/comments/new/"
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(
+            url, {"after": comments[0].id, "format": "json"}
+        )
+    assert len(ctx.captured_queries) == 2
+    data = response.json()
+    assert [c["id"] for c in data["comments"]] == [
+        c.id for c in comments[1:]
+    ], "Должны возвращаться только комментарии новее переданного id."
+    assert data["last_id"] == comments[-1].id
+
+    empty = client.get(url, {"after": data["last_id"], "format": "json"})
+    assert empty.json() == {"comments": [], "last_id": comments[-1].id}
+
+
+def test_html_delta(client, thread):
+    post, comments = thread
+    url = f"/posts/{post.id}/comments/new/"
+    response = client.get(url, {"after": comments[1].id})
+    content = response.content.decode()
+    assert "delta comment" in content
+    assert comments[2].text in content and comments[1].text not in content
+    assert "other post comment" not in content
+    assert response["X-Last-Comment-Id"] == str(comments[2].id)
+
+    assert client.get(url, {"after": comments[2].id}).status_code == 204
+
+
+def test_delta_bad_request_and_hidden_post(client, mixer, user, thread):
+    post, _ = thread
+    url = f"/posts/{post.id}/comments/new/"
+    assert client.get(url, {"after": "x"}).status_code == 400
+    hidden = mixer.blend("blog.Post", author=user, is_published=False)
+    assert client.get(
+        f"/posts/{hidden.id}/comments/new/"
+    ).status_code == 404
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.caching import page_cache, page_cache_timeout
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures("clear_cache"),
+]
+
+
+@pytest.fixture
+def clear_cache():
+    page_cache().clear()
+    with override_settings(BLOG_PAGE_CACHE_TIMEOUT=300):
+        yield
+    page_cache().clear()
+
+
+def test_anonymous_feed_served_from_cache(
+        client, many_posts_with_published_locations
+):
+    first = client.get("/")
+    with CaptureQueriesContext(connection) as ctx:
+        second = client.get("/")
+    assert second.content == first.content
+    assert not [q for q in ctx.captured_queries if '"blog_' in q["sql"]], (
+        "Повторный анонимный запрос ленты должен обслуживаться из кеша."
+    )
+
+
+def test_logged_in_feed_not_cached(
+        user_client, many_posts_with_published_locations
+):
+    user_client.get("/")
+    with CaptureQueriesContext(connection) as ctx:
+        user_client.get("/")
+    assert [q for q in ctx.captured_queries if '"blog_' in q["sql"]]
+
+
+def test_page_cache_invalidated_on_change(
+        client, post_with_published_location
+):
+    client.get("/")
+    post_with_published_location.title = "Заголовок после правки"
+    post_with_published_location.save()
+    assert "Заголовок после правки" in client.get("/").content.decode()
+
+
+def test_login_keeps_cached_pages(
+        client, user, many_posts_with_published_locations
+):
+    client.get("/")
+    Client().force_login(user)
+    with CaptureQueriesContext(connection) as ctx:
+        client.get("/")
+    assert not [q for q in ctx.captured_queries if '"blog_' in q["sql"]], (
+        "Вход пользователя не должен сбрасывать кеш страниц."
+    )
+
+
+def test_page_cache_invalidated_on_display_name_change(client, user):
+    url = f"/profile/{user.username}/"
+    client.get(url)
+    user.first_name, user.last_name = "Новое", "Имя"
+    user.save()
+    assert "Новое Имя" in client.get(url).content.decode()
+
+
+def test_timeout_capped_at_next_scheduled_post(
+        mixer, user, published_category
+):
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(seconds=30),
+    )
+    assert 0 < page_cache_timeout() <= 30, (
+        "Время жизни кеша не должно превышать время до ближайшей"
+        " отложенной публикации."
+    )
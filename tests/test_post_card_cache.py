@@ -0,0 +1,45 @@
+import pytest
+from django.core.cache import caches
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clear_fragment_cache():
+    caches["template_fragments"].clear()
+    yield
+    caches["template_fragments"].clear()
+
+
+def test_post_card_is_cached(client, post_with_published_location):
+    client.get("/")
+    assert caches["template_fragments"]._cache, (
+        "Убедитесь, что карточка поста кешируется."
+    )
+
+
+@pytest.mark.parametrize("change", ["post", "category", "location", "author"])
+def test_post_card_cache_follows_changes(
+        client, post_with_published_location, change
+):
+    post = post_with_published_location
+    client.get("/")
+    target = {
+        "post": (post, "title"),
+        "category": (post.category, "title"),
+        "location": (post.location, "name"),
+        "author": (post.author, "username"),
+    }[change]
+    setattr(target[0], target[1], "fresh-value-after-edit")
+    target[0].save()
+    assert "fresh-value-after-edit" in client.get("/").content.decode(), (
+        f"Изменение ({change}) должно сбрасывать кеш карточки поста."
+    )
+
+
+def test_post_card_cache_follows_comment_count(
+        mixer, client, post_with_published_location
+):
+    client.get("/")
+    mixer.cycle(3).blend("blog.Comment", post=post_with_published_location)
+    assert "Комментарии (3)" in client.get("/").content.decode()
@@ -0,0 +1,52 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+# Queries each read view may issue for an anonymous reader, regardless of
+# how many posts, authors or comments the page shows. One of them is the
+# aggregate behind the conditional GET validators.
+QUERY_BUDGETS = {
+    "index": 3,
+    "category_posts": 4,
+    "profile": 4,
+    "post_detail": 3,
+}
+
+
+@pytest.fixture
+def busy_post(mixer, post_with_published_location):
+    authors = mixer.cycle(15).blend("auth.User")
+    mixer.cycle(15).blend(
+        "blog.Comment",
+        post=post_with_published_location,
+        author=mixer.sequence(*authors),
+    )
+    return post_with_published_location
+
+
+@pytest.fixture
+def view_urls(
+        many_posts_with_published_locations, busy_post, published_category,
+        user
+):
+    return {
+        "index": "/",
+        "category_posts": f"/category/{published_category.slug}/",
+        "profile": f"/profile/{user.username}/",
+        "post_detail": f"/posts/{busy_post.id}/",
+    }
+
+
+@pytest.mark.parametrize("view_name", QUERY_BUDGETS)
+def test_view_query_budget(client, view_urls, view_name):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(view_urls[view_name])
+    assert response.status_code == 200
+    n_queries = len(ctx.captured_queries)
+    assert n_queries <= QUERY_BUDGETS[view_name], (
+        f"Страница `{view_name}` выполнила {n_queries} запросов к БД при"
+        f" бюджете {QUERY_BUDGETS[view_name]}:\n"
+        + "\n".join(q["sql"] for q in ctx.captured_queries)
+    )
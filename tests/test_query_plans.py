@@ -0,0 +1,63 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.functions import CURSOR_PREVIOUS, encode_cursor
+
+pytestmark = [pytest.mark.django_db]
+
+BAD_PLAN_STEP = re.compile(r"^SCAN blog_|USE TEMP B-TREE")
+
+
+def _explain_view_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        client.get(url)
+    plans = []
+    with connection.cursor() as cursor:
+        for query in ctx.captured_queries:
+            if '"blog_' not in query["sql"]:
+                continue
+            cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+            plans.append((query["sql"], [row[3] for row in cursor.fetchall()]))
+    return plans
+
+
+@pytest.fixture
+def view_urls(
+        many_posts_with_published_locations, comment_to_a_post,
+        published_category, user
+):
+    posts = many_posts_with_published_locations
+    return [
+        "/",
+        "/?page=2",
+        f"/?cursor={encode_cursor(posts[5], 'n')}",
+        f"/?cursor={encode_cursor(posts[5], CURSOR_PREVIOUS)}",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+        f"/posts/{comment_to_a_post.post_id}/",
+        f"/posts/{comment_to_a_post.post_id}/comments/?cursor="
+        + CURSOR_PREVIOUS + comment_to_a_post.path,
+        f"/posts/{comment_to_a_post.post_id}/comments/"
+        f"{comment_to_a_post.id}/replies/",
+        f"/posts/{comment_to_a_post.post_id}/comments/new/?after=0",
+        f"/posts/{comment_to_a_post.post_id}/comments/new/"
+        f"?after={comment_to_a_post.id}&format=json",
+    ]
+
+
+@pytest.mark.parametrize("keyset", [False, True], ids=["page", "keyset"])
+@pytest.mark.parametrize("client_name", ["user_client", "another_user_client"])
+def test_view_queries_use_indexes(request, view_urls, keyset, client_name):
+    client = request.getfixturevalue(client_name)
+    with override_settings(BLOG_KEYSET_PAGINATION=keyset):
+        for url in view_urls:
+            for sql, plan in _explain_view_queries(client, url):
+                bad = [step for step in plan if BAD_PLAN_STEP.search(step)]
+                assert not bad, (
+                    f"Запрос страницы {url} выполняется без подходящего"
+                    f" индекса: {bad}\n{sql}"
+                )
@@ -0,0 +1,73 @@
+import pytest
+from django.contrib.sessions.models import Session
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from blog.replicas import PIN_COOKIE
+
+pytestmark = [pytest.mark.django_db(databases=["default", "replica"])]
+
+
+@pytest.fixture(autouse=True)
+def replica(settings):
+    settings.BLOG_REPLICA_DATABASES = ["replica"]
+
+
+def _replicate(*objects):
+    for obj in objects:
+        obj.save(using="replica")
+
+
+def _replicate_post(post):
+    _replicate(post.author, post.category, post.location, post)
+
+
+def test_read_views_use_replica(client, post_with_published_location):
+    post = post_with_published_location
+    urls = [
+        f"/posts/{post.id}/",
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    ]
+    assert client.get(urls[0]).status_code == 404, (
+        "Страница поста должна читаться с реплики."
+    )
+    _replicate_post(post)
+    for url in urls:
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                response = client.get(url)
+        assert response.status_code == 200
+        assert post.title in response.content.decode()
+        assert replica.captured_queries and not primary.captured_queries, (
+            f"Страница {url} должна читаться только с реплики."
+        )
+
+
+def test_writer_reads_own_writes(user_client, user, mixer, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        location=None,
+    )
+    _replicate(user, published_category, post, *Session.objects.all())
+    url = f"/posts/{post.id}/"
+    assert user_client.get(url).status_code == 200
+
+    response = user_client.post(
+        f"/posts/{post.id}/comment/", {"text": "fresh reply"}
+    )
+    assert response.cookies[PIN_COOKIE]["max-age"] == 10
+    assert "fresh reply" in user_client.get(url).content.decode(), (
+        "После записи пользователь должен читать с основной базы."
+    )
+
+    del user_client.cookies[PIN_COOKIE]
+    assert "fresh reply" not in user_client.get(url).content.decode()
+
+
+def test_other_views_use_primary(client, post_with_published_location):
+    assert client.get("/search/?q=x").status_code == 200
+    assert client.get(
+        f"/posts/{post_with_published_location.id}/comments/"
+    ).status_code == 200
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _found(client, query):
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == 200
+    return [post.id for post in response.context["page_obj"]]
+
+
+@pytest.fixture
+def posts(mixer, user, published_category):
+    return {
+        "title": mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title="Пингвины Антарктиды", text="Заметки путешественника",
+        ),
+        "text": mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title="Заметки", text="Здесь упомянуты пингвины мимоходом",
+        ),
+        "future": mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title="Пингвины в будущем", text="Пингвины",
+            pub_date=timezone.now() + timedelta(days=1),
+        ),
+        "hidden": mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title="Пингвины", text="Пингвины", is_published=False,
+        ),
+    }
+
+
+def test_search_respects_visibility(client, posts):
+    found = _found(client, "Пингвины")
+    assert set(found) == {posts["title"].id, posts["text"].id}, (
+        "Поиск должен учитывать правила видимости публикаций."
+    )
+
+
+def test_search_index_follows_edits(client, posts):
+    post = posts["text"]
+    post.text = "Текст про моржей"
+    post.save()
+    assert post.id in _found(client, "моржей")
+    assert post.id not in _found(client, "мимоходом")
+
+    post.delete()
+    assert _found(client, "моржей") == []
+
+
+def test_search_escapes_fts_syntax(client, posts):
+    assert _found(client, 'Пингвины" OR NEAR(') == []
+
+
+def test_rebuild_search_index(client, posts):
+    call_command("rebuild_post_search_index")
+    assert posts["title"].id in _found(client, "Антарктиды")
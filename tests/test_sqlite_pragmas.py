@@ -0,0 +1,42 @@
+import sqlite3
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+
+from blog.sqlite import apply_pragmas
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_pragmas_applied_to_django_connections(settings):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA busy_timeout")
+        assert cursor.fetchone()[0] == (
+            settings.BLOG_SQLITE_PRAGMAS["busy_timeout"]
+        ), "Настройки SQLite должны применяться к каждому соединению."
+
+
+def test_file_database_in_wal_mode(tmp_path, settings):
+    db = sqlite3.connect(tmp_path / "db.sqlite3")
+    apply_pragmas(db.cursor())
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db.execute("PRAGMA synchronous").fetchone()[0] == 1
+    assert db.execute("PRAGMA temp_store").fetchone()[0] == 2
+    db.close()
+
+
+def test_invalid_pragma_rejected():
+    db = sqlite3.connect(":memory:")
+    with pytest.raises(ImproperlyConfigured):
+        apply_pragmas(db.cursor(), {"journal_mode": "wal; DROP TABLE x"})
+
+
+def test_benchmark_command(capsys):
+    call_command(
+        "benchmark_sqlite", "--seconds", "0.2", "--rows", "100",
+        "--writers", "2", "--readers", "2",
+    )
+    out = capsys.readouterr().out
+    assert "default:" in out and "configured:" in out
@@ -0,0 +1,139 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment
+from blog.moderation import delete_comments
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _reply(user_client, post, text, reply_to=None):
+    data = {"text": text}
+    if reply_to is not None:
+        data["reply_to"] = reply_to.id
+    user_client.post(f"/posts/{post.id}/comment/", data)
+    return Comment.objects.get(text=text)
+
+
+@pytest.fixture
+def thread(user_client, post_with_published_location):
+    post = post_with_published_location
+    first = _reply(user_client, post, "node a")
+    second = _reply(user_client, post, "node b")
+    a1 = _reply(user_client, post, "node a1", first)
+    _reply(user_client, post, "node a1x", a1)
+    _reply(user_client, post, "node a2", first)
+    _reply(user_client, post, "node b1", second)
+    return post, first, a1
+
+
+def _texts(content):
+    return re.findall(r"node \w+", content)
+
+
+def test_thread_in_display_order(client, thread):
+    post, first, a1 = thread
+    with CaptureQueriesContext(connection) as ctx:
+        content = client.get(f"/posts/{post.id}/").content.decode()
+    assert _texts(content) == [
+        "node a", "node a1", "node a1x", "node a2", "node b", "node b1",
+    ], "Ответы должны выводиться сразу под комментарием, на который отвечают."
+    assert len(ctx.captured_queries) <= 3
+    a1x = Comment.objects.get(text="node a1x")
+    assert (a1x.depth, a1x.parent_pk) == (2, a1.id)
+    post.refresh_from_db()
+    assert post.comment_count == 6
+
+
+def test_subtree_is_one_range(client, thread):
+    post, first, _ = thread
+    subtree = Comment.objects.filter(post=post).subtree(first.path)
+    assert [c.text for c in subtree.order_by("path")] == [
+        "node a", "node a1", "node a1x", "node a2",
+    ]
+    with CaptureQueriesContext(connection) as ctx:
+        content = client.get(
+            f"/posts/{post.id}/comments/{first.id}/replies/"
+        ).content.decode()
+    assert _texts(content) == ["node a1", "node a1x", "node a2"]
+    assert len(ctx.captured_queries) == 3
+
+
+@override_settings(BLOG_COMMENT_RENDER_DEPTH=1)
+def test_deep_replies_load_on_demand(client, thread):
+    post, _, a1 = thread
+    content = client.get(f"/posts/{post.id}/").content.decode()
+    assert "node a1x" not in _texts(content), (
+        "Ответы глубже BLOG_COMMENT_RENDER_DEPTH не должны выводиться сразу."
+    )
+    replies_url = f"/posts/{post.id}/comments/{a1.id}/replies/"
+    assert replies_url in content
+    fragment = client.get(replies_url).content.decode()
+    assert _texts(fragment) == ["node a1x"]
+
+
+@override_settings(BLOG_COMMENT_MAX_DEPTH=1)
+def test_max_depth_flattens(user_client, thread):
+    post, first, a1 = thread
+    deep = _reply(user_client, post, "node deep", a1)
+    assert deep.depth == 1 and deep.parent_pk == first.id
+
+
+def test_delete_keeps_replies(user_client, client, thread):
+    post, first, a1 = thread
+    user_client.post(f"/posts/{post.id}/delete_comment/{first.id}/")
+    content = client.get(f"/posts/{post.id}/").content.decode()
+    assert _texts(content) == [
+        "node b", "node b1", "node a1", "node a1x", "node a2",
+    ], "Ответы на удалённый комментарий должны подниматься на его место."
+    a1.refresh_from_db()
+    assert (a1.depth, a1.parent_pk) == (0, None)
+    post.refresh_from_db()
+    assert post.comment_count == 5
+
+
+def test_bulk_delete_lifts_nested_replies(thread):
+    post, first, a1 = thread
+    delete_comments(Comment.objects.filter(pk__in=[first.pk, a1.pk]))
+    a1x = Comment.objects.get(text="node a1x")
+    assert (a1x.depth, a1x.parent_pk) == (0, None), (
+        "Ответы не должны ссылаться на удалённые комментарии."
+    )
+
+
+@override_settings(BLOG_COMMENTS_PER_PAGE=5, BLOG_COMMENT_RENDER_DEPTH=1)
+def test_page_of_hidden_replies_reads_on(user_client, client, thread):
+    post, first, a1 = thread
+    for i in range(12):
+        _reply(user_client, post, f"node deep{i}", a1)
+    content = client.get(f"/posts/{post.id}/").content.decode()
+    assert _texts(content) == ["node a", "node a1"]
+    assert f"/posts/{post.id}/comments/{a1.id}/replies/" in content
+    cursor = re.search(r'\?cursor=(\w+)" data-position="after"', content)
+    response = client.get(f"/posts/{post.id}/comments/?cursor={cursor[1]}")
+    assert response.status_code == 200
+    assert _texts(response.content.decode()) == [
+        "node a2", "node b", "node b1",
+    ], "Страница из одних скрытых ответов должна дочитываться дальше."
+
+
+@override_settings(BLOG_COMMENTS_PER_PAGE=2, BLOG_COMMENT_RENDER_DEPTH=1)
+def test_backward_page_flags_hidden_replies(client, thread):
+    post, _, a1 = thread
+    replies_url = f"/posts/{post.id}/comments/{a1.id}/replies/"
+    first = client.get(f"/posts/{post.id}/").content.decode()
+    assert _texts(first) == ["node a", "node a1"] and replies_url in first
+    # The page before the one starting with the hidden reply a1x.
+    a1x = Comment.objects.get(text="node a1x")
+    back = client.get(
+        f"/posts/{post.id}/comments/?cursor=p{a1x.path}"
+    ).content.decode()
+    assert _texts(back) == ["node a", "node a1"]
+    assert replies_url in back, (
+        "Ссылка на скрытые ответы не должна зависеть от направления"
+        " листания."
+    )
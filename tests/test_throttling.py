@@ -0,0 +1,57 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment
+from blog.throttling import check_rate
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def throttle_settings(settings):
+    settings.BLOG_THROTTLE_RATES = {"post": (2, 600), "comment": (2, 60)}
+
+
+def test_burst_rejected_before_db(
+        user_client, another_user_client, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/comment/"
+    for _ in range(2):
+        assert user_client.post(url, {"text": "spam"}).status_code == 302
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.post(url, {"text": "spam"})
+    assert response.status_code == 429
+    assert int(response["Retry-After"]) > 0
+    assert [q["sql"] for q in ctx.captured_queries
+            if "django_session" not in q["sql"]] == [], (
+        "Отклонённый запрос может читать только сессию."
+    )
+    assert Comment.objects.count() == 2
+
+    assert user_client.get(
+        f"/posts/{post_with_published_location.id}/"
+    ).status_code == 200
+    assert another_user_client.post(url, {"text": "ok"}).status_code == 302
+
+
+def test_limit_shared_by_sessions_of_a_user(
+        user, user_client, client, post_with_published_location
+):
+    client.force_login(user)
+    url = f"/posts/{post_with_published_location.id}/comment/"
+    for _ in range(2):
+        assert user_client.post(url, {"text": "spam"}).status_code == 302
+    assert client.post(url, {"text": "spam"}).status_code == 429, (
+        "Лимит должен действовать на пользователя, а не на сессию."
+    )
+
+
+def test_sliding_window():
+    rate = ("comment", "client")
+    assert check_rate(*rate, now=0) == 0
+    assert check_rate(*rate, now=1) == 0
+    assert check_rate(*rate, now=2) == 88
+    # The full previous window still weighs a little over one request.
+    assert check_rate(*rate, now=89) > 0
+    assert check_rate(*rate, now=90) == 0
@@ -0,0 +1,131 @@
+import base64
+from io import BytesIO, StringIO
+
+import pytest
+from PIL import Image
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from fixtures.images import image_file
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def big_image_post(
+        mixer, user, published_category, django_capture_on_commit_callbacks
+):
+    with override_settings(BLOG_IMAGE_WORKERS=0):
+        with django_capture_on_commit_callbacks(execute=True):
+            post = mixer.blend(
+                "blog.Post", author=user, category=published_category,
+                image=image_file((2000, 1000), name="big_image.jpg"),
+            )
+    post.refresh_from_db()
+    return post
+
+
+def test_variants_generated_after_upload(big_image_post):
+    manifest = big_image_post.image_variants
+    assert manifest["source"] == big_image_post.image.name
+    for image_format in ("jpeg", "webp"):
+        widths = []
+        for width, name in manifest["variants"][image_format]:
+            with default_storage.open(name) as fh, Image.open(fh) as variant:
+                assert variant.format.lower() == image_format
+                assert variant.width == width
+            widths.append(width)
+        assert widths == [1280, 960, 640, 480, 320]
+
+
+def test_card_uses_thumbnail(client, big_image_post):
+    content = client.get("/").content.decode()
+    card_url = default_storage.url(
+        dict(big_image_post.image_variants["variants"]["jpeg"])[640]
+    )
+    assert f'src="{card_url}"' in content, (
+        "Карточка поста должна ссылаться на уменьшенное изображение."
+    )
+    assert 'type="image/webp"' in content
+    assert "320w" in content and 'sizes="' in content
+
+
+def test_card_falls_back_to_original(
+        client, mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        image=image_file((2000, 1000), name="big_image.jpg"),
+    )
+    content = client.get("/").content.decode()
+    assert f'src="{post.image.url}"' in content
+    assert "srcset" not in content
+
+
+@pytest.mark.django_db(transaction=True)
+def test_generate_image_variants_command(
+        mixer, user, published_category, monkeypatch
+):
+    # Leave the variants to the command, not to a background worker.
+    monkeypatch.setattr("blog.signals.schedule_thumbnails", lambda pk: None)
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        image=image_file((700, 300), name="small.png"),
+    )
+    call_command("generate_image_variants", "--workers", "1")
+    post.refresh_from_db()
+    assert [w for w, _ in post.image_variants["variants"]["webp"]] == [
+        640, 480, 320
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_generate_image_variants_reports_failures(
+        mixer, user, published_category, monkeypatch
+):
+    with override_settings(BLOG_IMAGE_WORKERS=0):
+        post = mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            image=image_file((700, 300), name="small.png"),
+        )
+
+    def broken(name):
+        raise OSError("cannot decode")
+
+    monkeypatch.setattr("blog.images.build_variants", broken)
+    stdout, stderr = StringIO(), StringIO()
+    call_command(
+        "generate_image_variants", "--all", "--workers", "1",
+        stdout=stdout, stderr=stderr,
+    )
+    assert f"Post {post.pk}:" in stderr.getvalue()
+    assert "for 0 post(s), 1 failed" in stdout.getvalue(), (
+        "Команда должна считать только успешно обработанные посты."
+    )
+
+
+def test_placeholder_stored_with_variants(big_image_post):
+    placeholder = big_image_post.image_variants["placeholder"]
+    prefix = "data:image/jpeg;base64,"
+    assert placeholder.startswith(prefix)
+    data = base64.b64decode(placeholder[len(prefix):])
+    with Image.open(BytesIO(data)) as image:
+        assert max(image.size) <= 16, (
+            "Заглушка изображения должна быть размером в несколько пикселей."
+        )
+
+
+def test_card_shows_placeholder_without_decoding(
+        client, big_image_post, monkeypatch
+):
+    def fail(*args, **kwargs):
+        raise AssertionError("Изображения не должны открываться при запросе.")
+
+    monkeypatch.setattr(Image, "open", fail)
+    content = client.get("/").content.decode()
+    assert big_image_post.image_variants["placeholder"] in content, (
+        "Карточка поста должна сразу показывать встроенную заглушку."
+    )
+    assert content.count('loading="lazy"') == 1
+    detail = client.get(f"/posts/{big_image_post.id}/").content.decode()
+    assert 'loading="lazy"' not in detail
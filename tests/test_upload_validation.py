@@ -0,0 +1,95 @@
+import pytest
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from blog.forms import PostForm
+from blog.models import Post
+from fixtures.images import image_file
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _upload(size=(40, 30)):
+    return image_file(size, name="picture.png", uploaded=True)
+
+
+def _post_data(published_category):
+    return {
+        "title": "Заголовок",
+        "text": "Текст",
+        "pub_date": "2020-01-01T10:00",
+        "category": published_category.id,
+        "is_published": True,
+    }
+
+
+def _form(published_category, image):
+    return PostForm(_post_data(published_category), {"image": image})
+
+
+def test_valid_image_accepted(published_category):
+    form = _form(published_category, _upload())
+    assert form.is_valid(), form.errors
+    assert form.cleaned_data["image"].content_type == "image/png"
+
+
+@override_settings(BLOG_MAX_IMAGE_PIXELS=1000)
+def test_too_many_pixels_rejected(published_category):
+    form = _form(published_category, _upload(size=(40, 30)))
+    assert not form.is_valid()
+    assert form.errors.as_data()["image"][0].code == "too_many_pixels", (
+        "Изображение с разрешением больше допустимого должно отклоняться."
+    )
+
+
+def test_pixels_checked_before_decode(published_category, monkeypatch):
+    image = _upload(size=(40, 30))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Изображение не должно декодироваться.")
+
+    monkeypatch.setattr(Image.Image, "load", fail)
+    with override_settings(BLOG_MAX_IMAGE_PIXELS=1000):
+        form = _form(published_category, image)
+        assert not form.is_valid()
+        assert "image" in form.errors
+
+
+@override_settings(BLOG_IMAGE_FORMATS=("JPEG",))
+def test_unsupported_format_rejected(published_category):
+    form = _form(published_category, _upload())
+    assert not form.is_valid()
+    assert form.errors.as_data()["image"][0].code == "unsupported_format"
+
+
+def test_garbage_rejected(published_category):
+    image = SimpleUploadedFile("picture.png", b"not an image at all")
+    form = _form(published_category, image)
+    assert not form.is_valid()
+    assert form.errors.as_data()["image"][0].code == "invalid_image"
+
+
+@override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+def test_spooled_upload_saved(user_client, published_category):
+    data = _post_data(published_category)
+    data["image"] = _upload()
+    response = user_client.post("/posts/create/", data)
+    assert response.status_code == 302, (
+        "Загрузка изображения через временный файл должна проходить."
+    )
+    assert Post.objects.get(title="Заголовок").image
+
+
+@override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0, BLOG_MAX_UPLOAD_SIZE=100)
+def test_oversized_spooled_upload_rejected(user_client, published_category):
+    data = _post_data(published_category)
+    data["image"] = _upload()
+    response = user_client.post("/posts/create/", data)
+    assert response.status_code == 200
+    assert not Post.objects.filter(title="Заголовок").exists(), (
+        "Файл больше BLOG_MAX_UPLOAD_SIZE не должен сохраняться."
+    )
+    assert response.context["form"].errors.as_data()["image"][0].code == (
+        "too_large"
+    )